@@ -3,6 +3,7 @@ main.py
 -------
 Point d'entrée principal FastAPI. Importe et enregistre les routers.
 """
+import os
 from fastapi import FastAPI
 from app.db import init_db
 from app.routes.users import router as users_router
@@ -19,3 +20,16 @@ init_db()
 app.include_router(users_router)
 app.include_router(translate_router)
 app.include_router(documents_router)
+
+
+@app.on_event("startup")
+def preload_ia_models():
+    """
+    Précharge les modèles IA (LayoutParser, spaCy) au démarrage du worker
+    si VERSE_PRELOAD_MODELS=1 (la racine du projet doit être dans le PYTHONPATH).
+    """
+    if os.getenv("VERSE_PRELOAD_MODELS", "0") != "1":
+        return
+    from ia_mode.models import warmup_models
+    timings = warmup_models()
+    print(f"[STARTUP] Modèles IA préchargés : {timings}")
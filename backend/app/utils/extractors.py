@@ -3,6 +3,12 @@ from docx import Document
 from PIL import Image
 import pytesseract
 
+try:
+    # Moteur Tesseract persistant (racine du projet dans le PYTHONPATH)
+    from ia_mode.ocr_engine import image_to_string
+except ImportError:
+    image_to_string = pytesseract.image_to_string
+
 def extract_text_pdf(file):
     reader = PdfReader(file)
     text = ""
@@ -19,5 +25,5 @@ def extract_text_txt(file):
 
 def extract_text_image(file):
     image = Image.open(file)
-    return pytesseract.image_to_string(image, lang="eng+fra")
+    return image_to_string(image, lang="eng+fra")
 
@@ -0,0 +1,146 @@
+# verse/ia_mode/artifacts.py
+"""
+Écriture des fichiers produits par page (JSON de page, PNG, crops de formules, MathML,
+tableaux CSV/HTML) en tâche de fond, hors de la boucle d'extraction.
+
+- pool de threads ('workers') : l'encodage (zlib, json) et les écritures sur disque lent
+  ou réseau se font en parallèle du calcul de la page suivante ;
+- file bornée ('max_pending') : au-delà, submit() attend qu'une écriture se termine
+  (pas d'accumulation de pages en mémoire si le disque ne suit pas) ;
+- écriture dans <fichier>.<id>.tmp puis os.replace : un lecteur ne voit jamais de fichier partiel ;
+- flush() attend les écritures en cours et rend les erreurs survenues depuis le dernier flush.
+
+workers=0 : écriture immédiate dans le thread appelant (même interface).
+raise_errors=True : une écriture en échec lève ArtifactWriteError (dès submit() en écriture
+immédiate, sinon au flush()) au lieu d'être seulement rendue par flush().
+"""
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ARTIFACT_WORKERS = 2
+ARTIFACT_MAX_PENDING = 64
+
+class ArtifactWriteError(OSError):
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"{e['path']}: {e['error']}" for e in errors))
+
+class ArtifactWriter:
+
+    def __init__(self, workers=ARTIFACT_WORKERS, max_pending=ARTIFACT_MAX_PENDING, raise_errors=False):
+        self.workers = workers
+        self.raise_errors = raise_errors
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="artifacts") if workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._errors = []
+        self.written = 0
+
+    def _run(self, path, fn, page_num):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            fn(tmp)
+            os.replace(tmp, path)
+            with self._lock:
+                self.written += 1
+        except Exception as e:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            with self._lock:
+                self._errors.append({"page": page_num, "path": path, "error": f"{type(e).__name__}: {e}"})
+
+    def submit(self, path, fn, page_num=None):
+        """
+        Écrit 'path' par fn(chemin_temporaire). 'page_num' (index 0) est rappelé dans les erreurs.
+        """
+        if self._executor is None:
+            self._run(path, fn, page_num)
+            if self.raise_errors:
+                self._raise_errors()
+            return
+        self._slots.acquire()
+        future = self._executor.submit(self._run, path, fn, page_num)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+        self._slots.release()
+
+    def write_bytes(self, path, data, page_num=None):
+        def write(tmp):
+            with open(tmp, "wb") as f:
+                f.write(data)
+        self.submit(path, write, page_num)
+
+    def write_text(self, path, text, page_num=None):
+        def write(tmp):
+            with open(tmp, "w", encoding="utf8") as f:
+                f.write(text)
+        self.submit(path, write, page_num)
+
+    def write_json(self, path, obj, indent=None, page_num=None):
+        """
+        'obj' est sérialisé dans le thread d'écriture : l'appelant ne doit plus le modifier.
+        """
+        def write(tmp):
+            with open(tmp, "w", encoding="utf8") as f:
+                json.dump(obj, f, ensure_ascii=False, indent=indent)
+        self.submit(path, write, page_num)
+
+    def save_image(self, path, image, page_num=None, **save_kwargs):
+        save_kwargs.setdefault("format", "PNG")
+        self.submit(path, lambda tmp: image.save(tmp, **save_kwargs), page_num)
+
+    def flush(self):
+        """
+        Attend toutes les écritures soumises ; rend (et oublie) les erreurs survenues.
+        """
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                break
+            for future in pending:
+                future.result()
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors and self.raise_errors:
+            raise ArtifactWriteError(errors)
+        return errors
+
+    def _raise_errors(self):
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise ArtifactWriteError(errors)
+
+    def close(self):
+        errors = self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        return errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def writer_or_inline(artifacts=None):
+    """
+    'artifacts' s'il est donné, sinon un écrivain immédiat qui lève ArtifactWriteError :
+    sans écrivain partagé (et son flush() suivi par l'appelant), une écriture en échec
+    n'est jamais passée sous silence.
+    """
+    return artifacts if artifacts is not None else ArtifactWriter(workers=0, raise_errors=True)
@@ -0,0 +1,330 @@
+# verse/ia_mode/benchmarks/bench_extraction.py
+"""
+Benchmark reproductible de l'extraction sur le corpus synthétique (synthetic_pdfs).
+
+Trois familles de mesures, à configuration fixe (CONFIGS, PAGE_DPI) :
+- extract_all : document complet par configuration -> pages/s, latences par étape
+  (p50 / p95 / p99 du temps propre, d'après les mesures ia_mode.metrics), RSS max ;
+- étapes isolées par page : cluster_words_to_lines et fusion_blocks, avec les zones
+  dessinées comme blocs de mise en page (pas de Detectron2) ;
+- exports : JSON/Pickle, lignes CSV/TXT, NDJSON indexé et compact .vpk, à partir des
+  pages produites par extract_all.
+Chaque mesure tourne dans un processus neuf (RSS max propre à la mesure). Une mesure
+dont une dépendance manque (Detectron2, spaCy, tesseract...) est rapportée avec "error".
+
+Une ligne JSON par résultat ; --out écrit le rapport complet, --compare le confronte
+à un rapport précédent (variations au-delà de --tolerance signalées "regression").
+
+    python -m ia_mode.benchmarks.bench_extraction --pages 12 --out bench.json
+    python -m ia_mode.benchmarks.bench_extraction --pages 12 --compare bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import numpy as np
+
+# Configurations figées : changer une valeur rend les rapports précédents incomparables
+PAGE_DPI = 200
+CONFIGS = {
+    "serial": {"workers": 1},
+    "serial_compact": {"workers": 1, "page_format": "compact"},
+    "layout_1024": {"workers": 1, "layout_max_side": 1024},
+    "workers_2": {"workers": 2},
+    "ocr_always": {"workers": 1, "ocr_mode": "always"},
+}
+MICRO_REPEAT = 5
+EXPORT_REPEAT = 5
+
+def peak_rss_mb():
+    # Processus courant et ses enfants terminés (workers d'extraction)
+    import resource
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / unit, 1)
+
+def latency(values):
+    values = np.asarray(values, dtype=float)
+    return {
+        "calls": int(values.size),
+        "mean_s": round(float(values.mean()), 6),
+        "p50_s": round(float(np.percentile(values, 50)), 6),
+        "p95_s": round(float(np.percentile(values, 95)), 6),
+        "p99_s": round(float(np.percentile(values, 99)), 6),
+    }
+
+def stage_latencies(events):
+    # Temps propre de chaque étape mesurée par ia_mode.metrics, une valeur par appel
+    by_stage = {}
+    for e in events:
+        if e.get("event") == "stage":
+            by_stage.setdefault(e["stage"], []).append(e["self_wall"])
+    return {name: dict(latency(values), total_s=round(sum(values), 4)) for name, values in sorted(by_stage.items())}
+
+def run_extract_all(pdf_path, config_name, work_dir):
+    """
+    extract_all sur une copie du PDF (sortie output_<nom> propre à la configuration).
+    """
+    from ia_mode.extraction import extract_all
+    from ia_mode.checkpoint import ExtractionManifest
+    run_dir = os.path.join(work_dir, config_name)
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(run_dir)
+    pdf_copy = os.path.join(run_dir, os.path.basename(pdf_path))
+    shutil.copy(pdf_path, pdf_copy)
+    events = []
+    t0 = time.perf_counter()
+    extract_all(pdf_copy, dpi=PAGE_DPI, metrics_callback=events.append, **CONFIGS[config_name])
+    wall = time.perf_counter() - t0
+    pages = sum(1 for e in events if e.get("event") == "page")
+    output_dir = os.path.join(run_dir, "output_" + os.path.splitext(os.path.basename(pdf_path))[0])
+    checkpoint = ExtractionManifest.for_output(output_dir).summary()
+    if not pages and checkpoint["failed"]:
+        # Aucune page extraite : la mesure n'a pas de sens, on rapporte la cause
+        return {"bench": "extract_all", "config": config_name, "error": next(iter(checkpoint["failed"].values()))}
+    return {
+        "bench": "extract_all",
+        "config": config_name,
+        "pages": pages,
+        "failed_pages": len(checkpoint["failed"]),
+        "wall_s": round(wall, 3),
+        "pages_per_s": round(pages / wall, 3) if wall else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stage_latencies(events),
+        "ndjson": os.path.join(output_dir, "export", "extraction_doc.ndjson"),
+    }
+
+def load_corpus_pages(pdf_path, images_dir):
+    """
+    Entrées des étapes isolées : mots pdfplumber, rendu, repère et blocs de référence par page.
+    """
+    import pdfplumber
+    from ia_mode.coords import PageCoords
+    from ia_mode.extraction import extract_pdfplumber_features
+    from ia_mode.benchmarks.synthetic_pdfs import load_truth
+    truth = load_truth(pdf_path)
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page, page_truth in zip(pdf.pages, truth):
+            image = page.to_image(resolution=PAGE_DPI).original.convert("RGB")
+            pages.append({
+                "kind": page_truth["kind"],
+                "features": extract_pdfplumber_features(page, images_dir),
+                "blocks": [dict(r, score=1.0) for r in page_truth["regions"]],
+                "image": image,
+                "coords": PageCoords.for_page(page, image, PAGE_DPI),
+            })
+    return pages
+
+def run_micro(pdf_path, work_dir):
+    """
+    cluster_words_to_lines et fusion_blocks page par page (MICRO_REPEAT passes).
+    """
+    from ia_mode.ocr import PageOCR
+    from ia_mode.extraction import cluster_words_to_lines, fusion_blocks
+    mathml_dir = os.path.join(work_dir, "micro_mathml")
+    os.makedirs(mathml_dir, exist_ok=True)
+    pages = load_corpus_pages(pdf_path, os.path.join(work_dir, "micro_images"))
+    results = []
+
+    timings = []
+    for _ in range(MICRO_REPEAT):
+        for p in pages:
+            t0 = time.perf_counter()
+            cluster_words_to_lines(p["features"]["words"], y_thresh=5)
+            timings.append(time.perf_counter() - t0)
+    results.append(dict(bench="cluster_words_to_lines", pages=len(pages), **latency(timings)))
+
+    try:
+        # OCR pleine page hors mesure : fusion_blocks s'en sert pour les blocs sans mots (pages scannées)
+        for p in pages:
+            p["page_ocr"] = PageOCR.from_image(p["image"]) if not p["features"]["words"] else None
+        timings, by_kind = [], {}
+        for _ in range(MICRO_REPEAT):
+            for p in pages:
+                t0 = time.perf_counter()
+                fusion_blocks(p["blocks"], p["features"], [], p["image"], mathml_dir,
+                              page_ocr=p["page_ocr"], coords=p["coords"])
+                elapsed = time.perf_counter() - t0
+                timings.append(elapsed)
+                by_kind.setdefault(p["kind"], []).append(elapsed)
+        results.append(dict(
+            bench="fusion_blocks", pages=len(pages), **latency(timings),
+            by_kind={kind: latency(values) for kind, values in sorted(by_kind.items())}
+        ))
+    except Exception as e:
+        results.append({"bench": "fusion_blocks", "error": f"{type(e).__name__}: {e}"})
+    for r in results:
+        r["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+def _file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+def run_exports(ndjson_path, work_dir):
+    """
+    Exporteurs sur les pages d'une extraction (EXPORT_REPEAT passes chacun).
+    """
+    from ia_mode.extraction import export_document_json_pickle, export_lines_to_csv_txt
+    from ia_mode.page_stream import PageStreamWriter, PageStreamReader
+    from ia_mode.page_format import CompactWriter
+    pages = list(PageStreamReader(ndjson_path))
+    out_dir = os.path.join(work_dir, "exports")
+    os.makedirs(out_dir, exist_ok=True)
+
+    def json_pickle():
+        paths = export_document_json_pickle(pages, out_dir, base_name="bench_doc")
+        return sum(_file_size(p) for p in paths)
+
+    def lines_csv_txt():
+        export_lines_to_csv_txt(pages, out_dir, base_name="bench_lines")
+        return sum(_file_size(os.path.join(out_dir, f"bench_lines.{ext}")) for ext in ("csv", "txt"))
+
+    def ndjson():
+        path = os.path.join(out_dir, "bench_doc.ndjson")
+        with PageStreamWriter(path) as writer:
+            for page in pages:
+                writer.write(page)
+        return _file_size(path) + _file_size(path + ".idx")
+
+    def compact():
+        path = os.path.join(out_dir, "bench_doc.vpk")
+        with CompactWriter(path) as writer:
+            for page in pages:
+                writer.write(page)
+        return _file_size(path)
+
+    results = []
+    for name, fn in (("json_pickle", json_pickle), ("lines_csv_txt", lines_csv_txt),
+                     ("ndjson", ndjson), ("compact", compact)):
+        timings, size = [], 0
+        for _ in range(EXPORT_REPEAT):
+            t0 = time.perf_counter()
+            size = fn()
+            timings.append(time.perf_counter() - t0)
+        results.append(dict(bench="export", exporter=name, pages=len(pages), bytes=size, **latency(timings)))
+    for r in results:
+        r["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+def isolated(fn, *args):
+    """
+    Exécute fn(*args) dans un processus neuf ("spawn") ; une exception devient {"error": ...}.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    # Pas de multiprocessing.Pool : ses processus (daemon) ne peuvent pas lancer les workers d'extraction
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        try:
+            return executor.submit(fn, *args).result()
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+def run(work_dir, pages=12, seed=0, configs=None, doc="mixed"):
+    from ia_mode.benchmarks.synthetic_pdfs import build_corpus
+    corpus = build_corpus(os.path.join(work_dir, "corpus"), pages=pages, seed=seed)
+    pdf_path = corpus[doc]
+    results = []
+    ndjson_path = None
+    for name in configs or list(CONFIGS):
+        result = isolated(run_extract_all, pdf_path, name, work_dir)
+        result.setdefault("bench", "extract_all")
+        result.setdefault("config", name)
+        if "error" not in result and ndjson_path is None:
+            ndjson_path = result["ndjson"]
+        result.pop("ndjson", None)
+        results.append(result)
+    micro = isolated(run_micro, pdf_path, work_dir)
+    results.extend(micro if isinstance(micro, list) else [dict(micro, bench="micro")])
+    if ndjson_path:
+        exports = isolated(run_exports, ndjson_path, work_dir)
+        results.extend(exports if isinstance(exports, list) else [dict(exports, bench="export")])
+    else:
+        results.append({"bench": "export", "error": "aucune extraction réussie (pas de pages à exporter)"})
+    meta = {
+        "doc": doc,
+        "pages": pages,
+        "seed": seed,
+        "dpi": PAGE_DPI,
+        "configs": {name: CONFIGS[name] for name in configs or CONFIGS},
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "time": round(time.time()),
+    }
+    return {"meta": meta, "results": results}
+
+def _result_key(r):
+    return (r.get("bench"), r.get("config"), r.get("exporter"))
+
+def compare(previous, current, tolerance=0.15):
+    """
+    Variations entre deux rapports : pages/s (extract_all) et p50 (étapes, exports).
+    Une variation défavorable au-delà de 'tolerance' est marquée "regression".
+    """
+    before = {_result_key(r): r for r in previous["results"]}
+    changes = []
+
+    def check(key, metric, old, new, higher_is_better=False):
+        if not old or new is None:
+            return
+        ratio = new / old
+        worse = ratio < 1 - tolerance if higher_is_better else ratio > 1 + tolerance
+        changes.append({
+            "bench": key[0], "config": key[1], "exporter": key[2], "metric": metric,
+            "before": old, "after": new, "ratio": round(ratio, 3), "regression": worse,
+        })
+
+    for r in current["results"]:
+        key = _result_key(r)
+        old = before.get(key)
+        if old is None or "error" in r or "error" in old:
+            continue
+        if r["bench"] == "extract_all":
+            check(key, "pages_per_s", old.get("pages_per_s"), r.get("pages_per_s"), higher_is_better=True)
+            for name, lat in r.get("stages", {}).items():
+                check(key, f"{name}.p50_s", old.get("stages", {}).get(name, {}).get("p50_s"), lat["p50_s"])
+        else:
+            check(key, "p50_s", old.get("p50_s"), r.get("p50_s"))
+        check(key, "peak_rss_mb", old.get("peak_rss_mb"), r.get("peak_rss_mb"))
+    return changes
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction sur corpus synthétique")
+    parser.add_argument("--pages", type=int, default=12, help="Pages du document mixte")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du corpus")
+    parser.add_argument("--doc", default="mixed", help="Document du corpus (mixed ou un type de page)")
+    parser.add_argument("--configs", nargs="+", default=None, choices=list(CONFIGS), help="Configurations extract_all")
+    parser.add_argument("--work_dir", default=None, help="Dossier de travail (défaut : temporaire, supprimé)")
+    parser.add_argument("--out", default=None, help="Écrit le rapport JSON complet")
+    parser.add_argument("--compare", default=None, help="Rapport JSON précédent à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Variation tolérée avant régression")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="verse_bench_")
+    try:
+        report = run(work_dir, pages=args.pages, seed=args.seed, configs=args.configs, doc=args.doc)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    for r in report["results"]:
+        print(json.dumps(r, ensure_ascii=False))
+    if args.out:
+        with open(args.out, "w", encoding="utf8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf8") as f:
+            previous = json.load(f)
+        changes = compare(previous, report, args.tolerance)
+        for change in changes:
+            if change["regression"]:
+                print(json.dumps(dict(change, bench="compare"), ensure_ascii=False))
+        regressions = sum(1 for c in changes if c["regression"])
+        print(json.dumps({"bench": "compare", "compared": len(changes), "regressions": regressions}))
+        sys.exit(1 if regressions else 0)
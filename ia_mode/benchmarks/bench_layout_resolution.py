@@ -0,0 +1,98 @@
+# verse/ia_mode/benchmarks/bench_layout_resolution.py
+"""
+Benchmark de la détection de mise en page à résolution réduite.
+Pour chaque page du corpus : détection sur le rendu complet (référence), puis sur une
+copie réduite à chaque 'max_side' demandé (bbox remises à l'échelle du rendu).
+Rapporte le temps par page, l'accélération, et l'accord avec la référence :
+appariement glouton des blocs de même type par IoU décroissant, IoU moyen des paires,
+rappel / précision à IoU >= 0.5.
+
+    python -m ia_mode.benchmarks.bench_layout_resolution corpus/*.pdf --max_side 1600 1024 800
+"""
+
+import time
+import numpy as np
+from ia_mode.layout import detect_layout_batch
+from ia_mode.word_merge import bbox_array, iou_matrix
+
+def match_blocks(reference, candidate, iou_thresh=0.5):
+    """
+    Appariement glouton 1-1 (même type, IoU décroissant) entre deux listes de blocs.
+    Retourne (liste des IoU appariés, nb de paires à IoU >= iou_thresh).
+    """
+    if not reference or not candidate:
+        return [], 0
+    iou = iou_matrix(bbox_array(reference), bbox_array(candidate))
+    same_type = np.array([[r["type"] == c["type"] for c in candidate] for r in reference])
+    iou = np.where(same_type, iou, 0.0)
+    pairs = sorted(zip(*np.nonzero(iou > 0)), key=lambda rc: -iou[rc])
+    used_r, used_c, ious = set(), set(), []
+    for r, c in pairs:
+        if r in used_r or c in used_c:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        ious.append(float(iou[r, c]))
+    return ious, sum(1 for v in ious if v >= iou_thresh)
+
+def load_pages(pdf_paths, dpi, max_pages):
+    from pdf2image import convert_from_path
+    pages = []
+    for path in pdf_paths:
+        images = convert_from_path(path, dpi=dpi, first_page=1, last_page=max_pages)
+        pages.extend((path, i, img.convert("RGB")) for i, img in enumerate(images))
+    return pages
+
+def timed_detect(images, batch_size, max_side):
+    t0 = time.perf_counter()
+    blocks = detect_layout_batch(images, batch_size=batch_size, max_side=max_side)
+    return time.perf_counter() - t0, blocks
+
+def run(pdf_paths, max_sides, dpi=300, max_pages=5, batch_size=4):
+    pages = load_pages(pdf_paths, dpi, max_pages)
+    images = [img for _, _, img in pages]
+    if not images:
+        return []
+    # Première passe non mesurée : chargement du modèle et allocations
+    detect_layout_batch(images[:1], batch_size=1)
+    t_ref, reference = timed_detect(images, batch_size, None)
+    reports = [{
+        "max_side": None,
+        "pages": len(images),
+        "s_per_page": round(t_ref / len(images), 4),
+        "speedup": 1.0,
+        "blocks": sum(len(b) for b in reference),
+    }]
+    for max_side in max_sides:
+        t, result = timed_detect(images, batch_size, max_side)
+        ious, matched = [], 0
+        n_ref = sum(len(b) for b in reference)
+        n_cand = sum(len(b) for b in result)
+        for ref_blocks, cand_blocks in zip(reference, result):
+            page_ious, page_matched = match_blocks(ref_blocks, cand_blocks)
+            ious.extend(page_ious)
+            matched += page_matched
+        reports.append({
+            "max_side": max_side,
+            "pages": len(images),
+            "s_per_page": round(t / len(images), 4),
+            "speedup": round(t_ref / t, 2) if t else None,
+            "blocks": n_cand,
+            "mean_iou": round(float(np.mean(ious)), 4) if ious else None,
+            "recall@0.5": round(matched / n_ref, 4) if n_ref else None,
+            "precision@0.5": round(matched / n_cand, 4) if n_cand else None,
+        })
+    return reports
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Benchmark détection de mise en page à résolution réduite")
+    parser.add_argument("pdfs", nargs="+", help="PDF du corpus")
+    parser.add_argument("--max_side", type=int, nargs="+", default=[1600, 1024, 800], help="Grands côtés testés (px)")
+    parser.add_argument("--dpi", type=int, default=300, help="Résolution du rendu de référence")
+    parser.add_argument("--max_pages", type=int, default=5, help="Pages lues par PDF")
+    parser.add_argument("--batch_size", type=int, default=4, help="Taille des lots d'inférence")
+    args = parser.parse_args()
+    for report in run(args.pdfs, args.max_side, args.dpi, args.max_pages, args.batch_size):
+        print(json.dumps(report))
@@ -0,0 +1,91 @@
+# verse/ia_mode/benchmarks/bench_merge_blocks.py
+"""
+Micro-benchmark de la fusion verticale des blocs de mise en page sur des pages
+synthétiques : colonnes de paragraphes découpés en fragments par le "modèle",
+plus du bruit (blocs isolés). Compare l'ancienne double boucle O(n²) à
+merge_vertical_blocks (tri + balayage, union-find). Ne dépend pas de Detectron2.
+
+    python -m ia_mode.benchmarks.bench_merge_blocks --blocks 100 400 1600
+"""
+
+import copy
+import random
+import time
+from ia_mode.layout import merge_vertical_blocks
+
+def make_page(n_blocks, columns=3, fragments=4, seed=0):
+    rnd = random.Random(seed)
+    blocks = []
+    col_width = 2400 / columns
+    y = [100.0] * columns
+    while len(blocks) < n_blocks:
+        col = rnd.randrange(columns)
+        x0 = 40 + col * col_width + rnd.uniform(-5, 5)
+        x1 = x0 + col_width - 80 + rnd.uniform(-5, 5)
+        if rnd.random() < 0.15:
+            # Bloc isolé (figure, titre décalé...)
+            blocks.append({"type": "Figure", "bbox": [x0 + 200, y[col], x1 - 200, y[col] + 150], "score": 0.8})
+            y[col] += 200
+            continue
+        # Paragraphe découpé en fragments consécutifs, séparés de quelques pixels
+        for _ in range(rnd.randint(2, fragments)):
+            h = rnd.uniform(30, 90)
+            blocks.append({"type": "Text", "bbox": [x0 + rnd.uniform(-3, 3), y[col], x1 + rnd.uniform(-3, 3), y[col] + h], "score": 0.9})
+            y[col] += h + rnd.uniform(2, 12)
+        y[col] += 60
+    rnd.shuffle(blocks)
+    return blocks[:n_blocks]
+
+def legacy_merge(blocks, thresh=15.0):
+    # Ancienne version de extraction.merge_vertical_blocks, conservée pour comparaison
+    merged = []
+    used = [False] * len(blocks)
+    for i, blk in enumerate(blocks):
+        if used[i]:
+            continue
+        curr = blk.copy()
+        for j, other in enumerate(blocks):
+            if i == j or used[j]:
+                continue
+            if abs(curr['bbox'][0] - other['bbox'][0]) < thresh and abs(curr['bbox'][2] - other['bbox'][2]) < thresh:
+                if 0 < abs(curr['bbox'][3] - other['bbox'][1]) < 2 * thresh:
+                    curr['bbox'][3] = max(curr['bbox'][3], other['bbox'][3])
+                    used[j] = True
+        merged.append(curr)
+        used[i] = True
+    return merged
+
+def timeit(fn, make_input, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        data = make_input()
+        t0 = time.perf_counter()
+        result = fn(data)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def run(n_blocks, repeat=3):
+    page = make_page(n_blocks)
+    # L'ancienne version modifie les bbox de ses entrées : copie profonde à chaque essai
+    t_legacy, legacy = timeit(legacy_merge, lambda: copy.deepcopy(page), repeat)
+    t_new, new = timeit(merge_vertical_blocks, lambda: page, repeat)
+    return {
+        "blocks": n_blocks,
+        "legacy_s": round(t_legacy, 6),
+        "sweep_s": round(t_new, 6),
+        "speedup": round(t_legacy / t_new, 1) if t_new else None,
+        "legacy_out": len(legacy),
+        "sweep_out": len(new),
+        "max_chain": max(len(b["merged_from"]) for b in new) if new else 0,
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Benchmark fusion verticale des blocs")
+    parser.add_argument("--blocks", type=int, nargs="+", default=[100, 400, 1600], help="Détections par page")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions (meilleur temps retenu)")
+    args = parser.parse_args()
+    for n in args.blocks:
+        print(json.dumps(run(n, args.repeat)))
@@ -0,0 +1,91 @@
+# verse/ia_mode/benchmarks/bench_sentence_alignment.py
+"""
+Micro-benchmark de l'alignement mots -> phrases sur de gros blocs synthétiques.
+Compare l'ancien alignement (parcours de tous les mots pour chaque phrase, O(S x W))
+à align_words_to_spans (curseur unique, O(W + S)). Ne dépend pas de spaCy :
+les phrases sont découpées sur les points.
+
+    python -m ia_mode.benchmarks.bench_sentence_alignment --words 20000 --sentence_len 15
+"""
+
+import random
+import time
+from ia_mode.sentences import align_words_to_spans
+
+VOCAB = ["le", "modèle", "extrait", "des", "phrases", "depuis", "chaque", "bloc", "de",
+         "la", "page", "avec", "précision", "auto-", "matiquement", "l'analyse", "x=2"]
+
+def make_block(n_words, sentence_len, seed=0):
+    rnd = random.Random(seed)
+    words = []
+    for i in range(n_words):
+        text = rnd.choice(VOCAB)
+        if (i + 1) % sentence_len == 0:
+            text += "."
+        words.append({"text": text, "bbox": [i % 80 * 10, i // 80 * 12, i % 80 * 10 + 9, i // 80 * 12 + 10]})
+    return words
+
+def split_spans(text):
+    spans = []
+    start = 0
+    for i, c in enumerate(text):
+        if c == "." and (i + 1 == len(text) or text[i + 1] == " "):
+            spans.append((start, i + 1))
+            start = i + 2
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+def legacy_align(words, text, spans):
+    # Ancien alignement de group_words_by_sentence_ultrafine, conservé pour comparaison
+    groups = []
+    for sent_start, sent_end in spans:
+        sent_text = text[sent_start:sent_end].strip()
+        sent_words = []
+        pointer = 0
+        for w in words:
+            if pointer >= len(sent_text):
+                break
+            candidate = sent_text[pointer:pointer+len(w['text'])]
+            if candidate == w['text']:
+                sent_words.append(w)
+                pointer += len(w['text'])
+                if pointer < len(sent_text) and sent_text[pointer] == ' ':
+                    pointer += 1
+        groups.append(sent_words)
+    return groups
+
+def timeit(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def run(n_words, sentence_len, repeat=3):
+    words = make_block(n_words, sentence_len)
+    text = " ".join(w["text"] for w in words)
+    spans = split_spans(text)
+    t_legacy, legacy = timeit(lambda: legacy_align(words, text, spans), repeat)
+    t_new, new = timeit(lambda: align_words_to_spans(words, spans), repeat)
+    return {
+        "words": n_words,
+        "sentences": len(spans),
+        "legacy_s": round(t_legacy, 6),
+        "linear_s": round(t_new, 6),
+        "speedup": round(t_legacy / t_new, 1) if t_new else None,
+        "legacy_words_kept": sum(len(g) for g in legacy),
+        "linear_words_kept": sum(len(g) for g in new),
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Benchmark alignement mots -> phrases")
+    parser.add_argument("--words", type=int, nargs="+", default=[500, 2000, 8000], help="Tailles de blocs (mots)")
+    parser.add_argument("--sentence_len", type=int, default=15, help="Mots par phrase")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions (meilleur temps retenu)")
+    args = parser.parse_args()
+    for n in args.words:
+        print(json.dumps(run(n, args.sentence_len, args.repeat)))
@@ -0,0 +1,216 @@
+# verse/ia_mode/benchmarks/synthetic_pdfs.py
+"""
+Corpus de PDF synthétiques déterministes (reportlab, hors ligne) pour les benchmarks.
+Chaque page est d'un des types de PAGE_KINDS :
+    text_columns  deux colonnes de paragraphes
+    lists         listes à puces et numérotées
+    table         tableau réglé (traits + texte des cellules)
+    formulas      lignes de formules (algèbre, chimie) entre des paragraphes
+    images        images raster avec légendes
+    scanned       page scannée : une seule image pleine page, aucune couche texte
+
+Même graine, mêmes paramètres -> mêmes octets (canvas reportlab 'invariant').
+Les zones dessinées sont écrites à côté du PDF (<nom>.truth.json), en points PDF
+origine haut-gauche (repère de ia_mode.coords), et servent de blocs de mise en page
+de référence aux benchmarks qui ne chargent pas Detectron2.
+
+    python -m ia_mode.benchmarks.synthetic_pdfs bench_corpus --pages 12
+"""
+
+import os
+import json
+import random
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+PAGE_KINDS = ("text_columns", "lists", "table", "formulas", "images", "scanned")
+PAGE_W, PAGE_H = 595.0, 842.0  # A4 en points
+MARGIN = 56.0
+SCAN_DPI = 150
+
+VOCAB = ("le", "modèle", "extrait", "des", "phrases", "depuis", "chaque", "bloc", "de", "la",
+         "page", "avec", "une", "précision", "stable", "analyse", "document", "traduction",
+         "colonne", "structure", "tableau", "figure", "résultat", "mesure", "OMS", "UNESCO")
+FORMULAS = ("E = mc^2", "x^2 + y^2 = z^2", "f(x) = a*x + b", "H2O + CO2 -> H2CO3",
+            "\\frac{a}{b} = 0.5", "sum_i x_i <= 3", "NaCl", "C6H12O6 + 6O2", "|u - v| < 10^-3")
+
+def sentence(rnd, n_min=6, n_max=16):
+    words = [rnd.choice(VOCAB) for _ in range(rnd.randint(n_min, n_max))]
+    return " ".join(words).capitalize() + "."
+
+def wrap(canvas, text, width, font="Helvetica", size=10):
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if canvas.stringWidth(candidate, font, size) > width and line:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+class PageBuilder:
+    """
+    Dessine une page et note ses zones (type, bbox haut-gauche en points).
+    """
+
+    def __init__(self, canvas, rnd):
+        self.c = canvas
+        self.rnd = rnd
+        self.regions = []
+
+    def region(self, kind, x0, top, x1, bottom):
+        self.regions.append({"type": kind, "bbox": [round(x0, 2), round(top, 2), round(x1, 2), round(bottom, 2)]})
+
+    def text(self, x, top, s, font="Helvetica", size=10):
+        # reportlab place la ligne de base depuis le bas de la page
+        self.c.setFont(font, size)
+        self.c.drawString(x, PAGE_H - top - size, s)
+
+    def paragraph(self, x, top, width, text, size=10, kind="Text"):
+        lines = wrap(self.c, text, width, size=size)
+        for i, line in enumerate(lines):
+            self.text(x, top + i * size * 1.3, line, size=size)
+        bottom = top + len(lines) * size * 1.3
+        self.region(kind, x, top, x + width, bottom)
+        return bottom
+
+    def title(self, top, text):
+        self.text(MARGIN, top, text, font="Helvetica-Bold", size=16)
+        self.region("Title", MARGIN, top, MARGIN + self.c.stringWidth(text, "Helvetica-Bold", 16), top + 20)
+        return top + 34
+
+    def text_columns(self):
+        top = self.title(MARGIN, sentence(self.rnd, 3, 5)[:-1])
+        col_w = (PAGE_W - 2 * MARGIN - 24) / 2
+        for col in range(2):
+            y = top
+            x = MARGIN + col * (col_w + 24)
+            while y < PAGE_H - MARGIN - 80:
+                text = " ".join(sentence(self.rnd) for _ in range(self.rnd.randint(2, 5)))
+                y = self.paragraph(x, y, col_w, text) + 12
+
+    def lists(self):
+        y = self.title(MARGIN, "Liste des éléments")
+        for numbered in (False, True, False):
+            top = y
+            for i in range(self.rnd.randint(4, 8)):
+                marker = f"{i + 1}." if numbered else "•"
+                self.text(MARGIN + 10, y, marker)
+                lines = wrap(self.c, sentence(self.rnd, 4, 12), PAGE_W - 2 * MARGIN - 40)
+                for j, line in enumerate(lines):
+                    self.text(MARGIN + 30, y + j * 13, line)
+                y += len(lines) * 13 + 4
+            self.region("List", MARGIN + 10, top, PAGE_W - MARGIN, y)
+            y += 20
+
+    def table(self):
+        y = self.title(MARGIN, "Tableau de résultats")
+        y = self.paragraph(MARGIN, y, PAGE_W - 2 * MARGIN, sentence(self.rnd)) + 16
+        rows, cols = self.rnd.randint(6, 12), self.rnd.randint(3, 5)
+        cell_w, cell_h = (PAGE_W - 2 * MARGIN) / cols, 20
+        top = y
+        self.c.setLineWidth(0.8)
+        for r in range(rows + 1):
+            self.c.line(MARGIN, PAGE_H - (top + r * cell_h), PAGE_W - MARGIN, PAGE_H - (top + r * cell_h))
+        for k in range(cols + 1):
+            self.c.line(MARGIN + k * cell_w, PAGE_H - top, MARGIN + k * cell_w, PAGE_H - (top + rows * cell_h))
+        for r in range(rows):
+            for k in range(cols):
+                value = self.rnd.choice(VOCAB) if r == 0 or k == 0 else f"{self.rnd.uniform(0, 100):.2f}"
+                self.text(MARGIN + k * cell_w + 4, top + r * cell_h + 5, value, size=9)
+        self.region("Table", MARGIN, top, PAGE_W - MARGIN, top + rows * cell_h)
+        self.paragraph(MARGIN, top + rows * cell_h + 16, PAGE_W - 2 * MARGIN, sentence(self.rnd))
+
+    def formulas(self):
+        y = self.title(MARGIN, "Équations")
+        while y < PAGE_H - MARGIN - 60:
+            y = self.paragraph(MARGIN, y, PAGE_W - 2 * MARGIN, sentence(self.rnd)) + 10
+            formula = self.rnd.choice(FORMULAS)
+            self.text(MARGIN + 80, y, formula, font="Courier", size=12)
+            self.region("Formula", MARGIN + 80, y, MARGIN + 80 + self.c.stringWidth(formula, "Courier", 12), y + 14)
+            y += 30
+
+    def images(self):
+        from reportlab.lib.utils import ImageReader
+        y = self.title(MARGIN, "Figures")
+        np_rnd = np.random.default_rng(self.rnd.randrange(2 ** 32))
+        while y < PAGE_H - MARGIN - 220:
+            w, h = self.rnd.uniform(200, PAGE_W - 2 * MARGIN), self.rnd.uniform(120, 200)
+            pixels = np_rnd.integers(0, 255, size=(int(h), int(w), 3), dtype=np.uint8)
+            self.c.drawImage(ImageReader(Image.fromarray(pixels)), MARGIN, PAGE_H - y - h, w, h)
+            self.region("Figure", MARGIN, y, MARGIN + w, y + h)
+            y = self.paragraph(MARGIN, y + h + 6, PAGE_W - 2 * MARGIN, "Figure : " + sentence(self.rnd, 4, 8), size=9) + 20
+
+    def scanned(self):
+        from reportlab.lib.utils import ImageReader
+        scale = SCAN_DPI / 72.0
+        image = Image.new("L", (int(PAGE_W * scale), int(PAGE_H * scale)), 255)
+        draw = ImageDraw.Draw(image)
+        try:
+            font = ImageFont.load_default(size=int(11 * scale))
+        except TypeError:
+            font = ImageFont.load_default()
+        y = MARGIN
+        while y < PAGE_H - MARGIN - 80:
+            top = y
+            for line in wrap(self.c, " ".join(sentence(self.rnd) for _ in range(3)), PAGE_W - 2 * MARGIN, size=11):
+                draw.text((MARGIN * scale, y * scale), line, fill=0, font=font)
+                y += 15
+            self.region("Text", MARGIN, top, PAGE_W - MARGIN, y)
+            y += 14
+        # Bruit de numérisation déterministe
+        np_rnd = np.random.default_rng(self.rnd.randrange(2 ** 32))
+        pixels = np.asarray(image, dtype=np.int16) + np_rnd.integers(-25, 25, size=(image.height, image.width))
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).rotate(0.4, fillcolor=255)
+        self.c.drawImage(ImageReader(image), 0, 0, PAGE_W, PAGE_H)
+
+def make_pdf(path, kinds, seed=0):
+    """
+    Écrit un PDF avec une page par élément de 'kinds', et ses zones de référence
+    (<path sans .pdf>.truth.json). Retourne la liste des pages {"page", "kind", "regions"}.
+    """
+    from reportlab.pdfgen import canvas
+    rnd = random.Random(seed)
+    c = canvas.Canvas(path, pagesize=(PAGE_W, PAGE_H), invariant=1)
+    truth = []
+    for i, kind in enumerate(kinds):
+        page = PageBuilder(c, random.Random(rnd.randrange(2 ** 32)))
+        getattr(page, kind)()
+        c.showPage()
+        truth.append({"page": i + 1, "kind": kind, "regions": page.regions})
+    c.save()
+    with open(os.path.splitext(path)[0] + ".truth.json", "w", encoding="utf8") as f:
+        json.dump(truth, f, ensure_ascii=False, indent=1)
+    return truth
+
+def build_corpus(out_dir, pages=12, seed=0, kinds=PAGE_KINDS):
+    """
+    Corpus de référence : un document mixte (types de page en alternance) et un document
+    par type de page. Retourne {nom: chemin du PDF}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    docs = {"mixed": [kinds[i % len(kinds)] for i in range(pages)]}
+    for kind in kinds:
+        docs[kind] = [kind] * max(1, pages // len(kinds))
+    paths = {}
+    for n, (name, page_kinds) in enumerate(sorted(docs.items())):
+        paths[name] = os.path.join(out_dir, f"{name}.pdf")
+        make_pdf(paths[name], page_kinds, seed=seed + n)
+    return paths
+
+def load_truth(pdf_path):
+    with open(os.path.splitext(pdf_path)[0] + ".truth.json", "r", encoding="utf8") as f:
+        return json.load(f)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Génère le corpus de PDF synthétiques des benchmarks")
+    parser.add_argument("out_dir", help="Dossier de sortie")
+    parser.add_argument("--pages", type=int, default=12, help="Pages du document mixte")
+    parser.add_argument("--seed", type=int, default=0, help="Graine")
+    args = parser.parse_args()
+    for name, path in build_corpus(args.out_dir, args.pages, args.seed).items():
+        print(json.dumps({"doc": name, "path": path, "pages": len(load_truth(path))}))
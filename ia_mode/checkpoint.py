@@ -0,0 +1,134 @@
+# verse/ia_mode/checkpoint.py
+"""
+Manifeste de reprise de l'extraction : output_<pdf>/checkpoint.jsonl.
+
+Journal en ajout seul, une ligne JSON par événement :
+    {"event": "run", "time": ..., "params": {...}}
+    {"event": "page", "page": 12, "status": "done", "seconds": 3.2, "file": "json/page_12.json", "time": ...}
+    {"event": "page", "page": 13, "status": "failed", "seconds": 0.4, "error": "...", "time": ...}
+    {"event": "artifact_error", "page": 14, "path": "tables/page14_table1.csv", "error": "...", "time": ...}
+L'état d'une page est celui de son dernier événement ; le nombre de tentatives est le
+nombre de ses événements. Un arrêt brutal ne perd au plus que la dernière ligne.
+
+    python -m ia_mode.checkpoint output_doc/checkpoint.jsonl
+"""
+
+import os
+import json
+import time
+
+MANIFEST_NAME = "checkpoint.jsonl"
+
+class ExtractionManifest:
+    """
+    État par page (1-based) d'une extraction : statut, durée, erreur, tentatives.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.runs = []
+        self.artifact_errors = []
+        if os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def for_output(cls, base_dir):
+        return cls(os.path.join(base_dir, MANIFEST_NAME))
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Dernière ligne tronquée par un arrêt brutal
+                    continue
+                if event.get("event") == "run":
+                    self.runs.append(event)
+                elif event.get("event") == "page":
+                    self._apply(event)
+                elif event.get("event") == "artifact_error":
+                    self.artifact_errors.append(event)
+
+    def _apply(self, event):
+        previous = self.pages.get(event["page"], {})
+        self.pages[event["page"]] = dict(event, attempts=previous.get("attempts", 0) + 1)
+
+    def _append(self, event):
+        event["time"] = round(time.time(), 3)
+        with open(self.path, "a", encoding="utf8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        return event
+
+    def start_run(self, params):
+        self.runs.append(self._append({"event": "run", "params": params}))
+
+    def mark_done(self, page, seconds, file=None):
+        self._apply(self._append({
+            "event": "page", "page": page, "status": "done", "seconds": round(seconds, 3), "file": file,
+        }))
+
+    def mark_failed(self, page, error, seconds=None):
+        self._apply(self._append({
+            "event": "page", "page": page, "status": "failed",
+            "seconds": round(seconds, 3) if seconds is not None else None, "error": str(error),
+        }))
+
+    def note_artifact_error(self, page, path, error):
+        """
+        Fichier de la page non écrit (ia_mode.artifacts) : la page reste extraite et exportée.
+        """
+        self.artifact_errors.append(self._append({
+            "event": "artifact_error", "page": page, "path": path, "error": str(error),
+        }))
+
+    def status(self, page):
+        return self.pages.get(page, {}).get("status")
+
+    def attempts(self, page):
+        return self.pages.get(page, {}).get("attempts", 0)
+
+    def is_done(self, page, base_dir=None):
+        """
+        Page terminée (et, si base_dir est donné, son fichier de page toujours présent).
+        """
+        entry = self.pages.get(page, {})
+        if entry.get("status") != "done":
+            return False
+        if base_dir and entry.get("file"):
+            return os.path.exists(os.path.join(base_dir, entry["file"]))
+        return True
+
+    def done_file(self, page, base_dir=None):
+        """
+        Fichier de page noté pour une page terminée (chemin sous base_dir s'il est donné), sinon None.
+        """
+        entry = self.pages.get(page, {})
+        if entry.get("status") != "done" or not entry.get("file"):
+            return None
+        return os.path.join(base_dir, entry["file"]) if base_dir else entry["file"]
+
+    def retryable(self, pages, max_attempts):
+        """
+        Pages en échec dont le nombre de tentatives est sous 'max_attempts'.
+        """
+        return [p for p in pages if self.status(p) == "failed" and self.attempts(p) < max_attempts]
+
+    def summary(self):
+        counts = {}
+        for entry in self.pages.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        failed = {p: e.get("error") for p, e in sorted(self.pages.items()) if e["status"] == "failed"}
+        return {"pages": len(self.pages), "status": counts, "failed": failed,
+                "artifact_errors": len(self.artifact_errors)}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="État d'une extraction (manifeste de reprise)")
+    parser.add_argument("path", help="checkpoint.jsonl, ou dossier output_<pdf>")
+    args = parser.parse_args()
+    path = args.path
+    if os.path.isdir(path):
+        path = os.path.join(path, MANIFEST_NAME)
+    print(json.dumps(ExtractionManifest(path).summary(), ensure_ascii=False, indent=2))
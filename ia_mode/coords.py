@@ -0,0 +1,78 @@
+# verse/ia_mode/coords.py
+"""
+Repères de coordonnées de l'extraction et conversions entre eux.
+
+- pdfplumber (mots, images, annotations) : points PDF, origine en haut à gauche ;
+- Tesseract et LayoutParser : pixels de l'image rendue (dpi), origine en haut à gauche ;
+- camelot : points PDF, origine en bas à gauche.
+
+Tout ce qui sort de l'extraction (JSON de page, lignes, tableaux) est exprimé dans
+l'espace COORD_SPACE ; les étapes qui travaillent sur l'image (OCR de repli, crops de
+formules) reconvertissent leurs bbox en pixels au moment du crop.
+"""
+
+import math
+
+# Points PDF, origine en haut à gauche : le repère de pdfplumber et de page["width"] / page["height"]
+COORD_SPACE = "pdf_points_top_left"
+
+# Tolérance d'arrondi : un aller-retour pixels -> points -> pixels retombe sur les mêmes pixels
+_EPS = 1e-6
+
+class PageCoords:
+    """
+    Conversions de bbox [x0, y0, x1, y1] pour une page : points PDF <-> pixels de rendu,
+    et repère camelot (origine en bas) -> repère de la page (origine en haut).
+    """
+
+    def __init__(self, page_width, page_height, image_width=None, image_height=None, dpi=300):
+        self.page_width = float(page_width)
+        self.page_height = float(page_height)
+        self.dpi = dpi
+        # Points par pixel : mesuré sur l'image si on l'a (le rendu arrondit la taille), sinon 72 / dpi
+        self.sx = self.page_width / image_width if image_width else 72.0 / dpi
+        self.sy = self.page_height / image_height if image_height else 72.0 / dpi
+        self.image_width = image_width or round(self.page_width / self.sx)
+        self.image_height = image_height or round(self.page_height / self.sy)
+
+    @classmethod
+    def for_page(cls, page, image=None, dpi=300):
+        """
+        Repère d'une page pdfplumber, et de son rendu 'image' (PIL) s'il est fourni.
+        """
+        width, height = (image.size if image is not None else (None, None))
+        return cls(page.width, page.height, width, height, dpi=dpi)
+
+    def to_points(self, bbox):
+        """
+        Pixels de rendu -> points PDF.
+        """
+        x0, y0, x1, y1 = bbox[:4]
+        return [x0 * self.sx, y0 * self.sy, x1 * self.sx, y1 * self.sy]
+
+    def to_pixels(self, bbox):
+        """
+        Points PDF -> pixels de rendu (arrondis vers l'extérieur, bornés à l'image).
+        """
+        x0, y0, x1, y1 = bbox[:4]
+        return [
+            max(0, math.floor(x0 / self.sx + _EPS)),
+            max(0, math.floor(y0 / self.sy + _EPS)),
+            min(self.image_width, math.ceil(x1 / self.sx - _EPS)),
+            min(self.image_height, math.ceil(y1 / self.sy - _EPS)),
+        ]
+
+    def from_bottom_left(self, bbox):
+        """
+        Bbox camelot / PDF natif (x0, y_bas, x1, y_haut, origine en bas) -> repère de la page.
+        """
+        if bbox is None:
+            return None
+        x0, y0, x1, y1 = bbox[:4]
+        return [x0, self.page_height - y1, x1, self.page_height - y0]
+
+    def items_to_points(self, items):
+        """
+        Copie d'une liste de dicts (mots OCR, blocs de mise en page) avec "bbox" passée en points.
+        """
+        return [dict(item, bbox=self.to_points(item["bbox"])) for item in items]
@@ -2,14 +2,33 @@ import os
 import json
 import re
 import pickle
-import camelot
+import time
+from dataclasses import dataclass, replace
 from pdf2image import convert_from_path
 from PIL import Image
-import pytesseract
-import spacy
-import layoutparser as lp
 from typing import List, Dict, Any, Tuple
 from lxml import etree
+from ia_mode.raster import PageRasterizer, PageRaster
+from ia_mode.ocr import PageOCR
+from ia_mode.ocr_engine import image_to_string, tesseract_version
+from ia_mode.spatial import WordGridIndex, assign_words_to_blocks
+from ia_mode.word_merge import merge_words
+from ia_mode.sentences import sentence_spans, align_words_to_spans
+from ia_mode.page_cache import PageCache, cached_stage, lookup_stage, store_stage, page_content_hash
+from ia_mode.tables import TableStage, read_tables_pages
+from ia_mode.layout import detect_layout_batch, merge_vertical_blocks, MERGE_THRESH_POINTS
+from ia_mode.coords import PageCoords, COORD_SPACE
+from ia_mode.phrases import PhraseClassifier
+from ia_mode.page_stream import PageStreamWriter, PageStreamReader
+from ia_mode.page_format import CompactWriter, write_compact_page, load_page, COMPACT_EXT
+from ia_mode.checkpoint import ExtractionManifest, MANIFEST_NAME
+from ia_mode.artifacts import ArtifactWriter, ARTIFACT_WORKERS, writer_or_inline
+from ia_mode.page_classifier import ocr_decision, page_signals, OCR_MODES
+from ia_mode.metrics import MetricsRecorder, METRICS_NAME, stage, recording, get_recorder, set_recorder
+from ia_mode.models import (
+    LAYOUT_MODEL_PATH, CONFIG_PATH, LAYOUT_LABEL_MAP, LAYOUT_SCORE_THRESH,
+    get_layout_model, get_ner, warmup_models
+)
 
 DEBUG = False
 
@@ -17,19 +36,14 @@ def log(msg):
     if DEBUG:
         print(msg)
 
-LAYOUT_MODEL_PATH = os.path.join(os.path.dirname(__file__), "models_pth/faster_rcnn_R_50_FPN_3x/model_final.pth")
-CONFIG_PATH = "lp://PubLayNet/faster_rcnn_R_50_FPN_3x/config"
-LAYOUT_MODEL = lp.Detectron2LayoutModel(
-    CONFIG_PATH,
-    LAYOUT_MODEL_PATH,
-    extra_config=["MODEL.ROI_HEADS.SCORE_THRESH_TEST", 0.5],
-    label_map={0: "Text", 1: "Title", 2: "List", 3: "Table", 4: "Figure"}
-)
-
-try:
-    NER = spacy.load("fr_core_news_md")
-except Exception:
-    NER = spacy.load("en_core_web_sm")
+def __getattr__(name):
+    # Compatibilité : LAYOUT_MODEL et NER restent accessibles comme attributs du module,
+    # mais ne sont chargés qu'au premier accès (voir ia_mode.models).
+    if name == "LAYOUT_MODEL":
+        return get_layout_model()
+    if name == "NER":
+        return get_ner()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # === PARAMETRES DE DETECTION DE FORMULES ===
 FORMULA_DETECTION_MODE = "strict"   # "strict" ou "flexible"
@@ -37,6 +51,21 @@ DETECT_LATEX = True
 DETECT_MATHML = True
 DETECT_CHEM = True
 
+# === OCR ===
+# Confiance Tesseract moyenne minimale pour réutiliser l'OCR pleine page d'un bloc
+# au lieu de relancer Tesseract sur le crop du bloc.
+OCR_FALLBACK_MIN_CONF = 60
+
+# === IMAGES DE PAGE ===
+# Niveau de compression zlib des PNG de page images/page_N.png (0-9) : 1 = encodage rapide,
+# fichiers un peu plus gros. Ces PNG ne servent qu'aux aperçus : l'extraction passe l'image en mémoire.
+PNG_COMPRESS_LEVEL = 1
+# Résolution des crops d'images intégrées (images/pageN_imgM.png)
+IMAGE_CROP_DPI = 300
+
+# Attributs des mots pdfplumber (le nombre de mots, signal de l'OCR sélectif, en dépend)
+PDF_WORD_ATTRS = ["fontname", "size"]
+
 # === DETECTION DISTINCTE POUR CHAQUE TYPE DE FORMULE ===
 def is_latex_formula(text):
     # Détecte une vraie formule LaTeX explicite (pas juste \sum ou \frac perdu dans du texte)
@@ -96,6 +125,18 @@ def is_formula_zone(text, mode=None):
         return True
     return False
 
+# Classifieur partagé entre les pages (son cache sert les en-têtes / pieds de page répétés),
+# reconstruit si les paramètres de détection ci-dessus changent.
+_PHRASE_CLASSIFIERS = {}
+
+def get_phrase_classifier(mode=None) -> PhraseClassifier:
+    settings = (mode or FORMULA_DETECTION_MODE, DETECT_LATEX, DETECT_MATHML, DETECT_CHEM)
+    classifier = _PHRASE_CLASSIFIERS.get(settings)
+    if classifier is None:
+        classifier = PhraseClassifier(*settings)
+        _PHRASE_CLASSIFIERS.clear()
+        _PHRASE_CLASSIFIERS[settings] = classifier
+    return classifier
 
 def make_output_dirs(pdf_path: str) -> Dict[str, str]:
     pdf_dir = os.path.dirname(os.path.abspath(pdf_path))
@@ -177,35 +218,84 @@ def extract_page_image(pdf_path: str, page_num: int, images_dir: str, dpi: int =
     images[0].save(image_path)
     return image_path
 
-def extract_tables(pdf_path: str, page_num: int, tables_dir: str, htmltables_dir: str) -> List[Dict[str, Any]]:
+def extract_page_image_in_memory(pdf_path: str, page_num: int, dpi: int = 300) -> Image.Image:
+    return convert_from_path(pdf_path, dpi=dpi, first_page=page_num+1, last_page=page_num+1)[0]
+
+def as_rgb(image) -> Image.Image:
+    """
+    Image RGB depuis une image PIL (sans copie si elle est déjà RGB) ou un chemin.
+    """
+    if isinstance(image, str):
+        image = Image.open(image)
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+def read_tables(pdf_path: str, page_num: int, flavor: str = "stream") -> List[Dict[str, Any]]:
+    """
+    Tableaux camelot d'une page, sous forme sérialisable : [{"data": [[...]], "bbox": [...]}].
+    """
+    return read_tables_pages(pdf_path, [page_num], flavor=flavor).get(page_num, [])
+
+def write_tables(raw_tables: List[Dict[str, Any]], page_num: int, tables_dir: str, htmltables_dir: str,
+                 artifacts: ArtifactWriter = None) -> List[Dict[str, Any]]:
+    """
+    Écrit chaque tableau en CSV et HTML (format camelot to_csv / to_html), par 'artifacts' s'il est donné.
+    Un tableau dont l'écriture immédiate échoue garde ses données, sans chemins de fichiers.
+    """
+    import pandas as pd
+    artifacts = writer_or_inline(artifacts)
     tables = []
-    try:
-        cam_tables = camelot.read_pdf(pdf_path, pages=str(page_num+1), flavor="stream")
-        for tidx, table in enumerate(cam_tables):
-            table_path = os.path.join(tables_dir, f"page{page_num+1}_table{tidx+1}.csv")
-            html_path = os.path.join(htmltables_dir, f"page{page_num+1}_table{tidx+1}.html")
-            try:
-                table.to_csv(table_path)
-                table.to_html(html_path)
-            except Exception:
-                table_path = None
-                html_path = None
-            tables.append({
-                "table_csv": table_path,
-                "html": html_path,
-                "data": getattr(table, "data", []),
-                "bbox": getattr(table, "_bbox", None)
-            })
-    except Exception as e:
-        log(f"[Camelot] Tables not found on page {page_num+1}: {e}")
+    for tidx, table in enumerate(raw_tables):
+        table_path = os.path.join(tables_dir, f"page{page_num+1}_table{tidx+1}.csv")
+        html_path = os.path.join(htmltables_dir, f"page{page_num+1}_table{tidx+1}.html")
+        try:
+            df = pd.DataFrame(table["data"])
+            artifacts.submit(
+                table_path,
+                lambda tmp, df=df: df.to_csv(tmp, encoding="utf-8", index=False, header=False, quoting=1),
+                page_num
+            )
+            artifacts.submit(html_path, lambda tmp, df=df: _write_html(tmp, df), page_num)
+        except Exception:
+            table_path = None
+            html_path = None
+        tables.append({
+            "table_csv": table_path,
+            "html": html_path,
+            "data": table["data"],
+            "bbox": table["bbox"]
+        })
     return tables
 
-def ocr_block(image, bbox, lang='fra+eng') -> str:
+def _write_html(path: str, df) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(df.to_html())
+
+def extract_tables(pdf_path: str, page_num: int, tables_dir: str, htmltables_dir: str) -> List[Dict[str, Any]]:
+    return write_tables(read_tables(pdf_path, page_num), page_num, tables_dir, htmltables_dir)
+
+def ocr_block(image, bbox, lang='fra+eng', page_ocr: PageOCR = None, min_conf: float = None) -> str:
+    """
+    OCR d'un bloc ('bbox' en pixels), lu dans l'OCR pleine page s'il est fourni ; Tesseract n'est
+    relancé sur le crop que si la zone n'y a aucun mot ou une confiance moyenne sous 'min_conf'.
+    """
+    if page_ocr is not None:
+        min_conf = OCR_FALLBACK_MIN_CONF if min_conf is None else min_conf
+        text, conf = page_ocr.text_in_bbox(bbox)
+        if text and conf >= min_conf:
+            log(f"    -> OCR bloc servi par le cache page (conf={conf:.0f})")
+            return text
     crop = image.crop((bbox[0], bbox[1], bbox[2], bbox[3]))
-    text = pytesseract.image_to_string(crop, lang=lang, config="--psm 6")
+    text = image_to_string(crop, lang=lang, psm=6)
     return text.strip()
 
-def extract_pdfplumber_features(page, images_dir: str) -> Dict[str, Any]:
+def extract_pdfplumber_features(page, images_dir: str, raster: PageRaster = None,
+                                artifacts: ArtifactWriter = None) -> Dict[str, Any]:
+    """
+    Mots, liens et images intégrées de la couche PDF ; crops des images découpés dans 'raster'
+    (rendu pleine page s'il existe, sinon rendu de la seule région de l'image).
+    """
+    raster = raster or PageRaster(page, dpi=IMAGE_CROP_DPI)
+    artifacts = writer_or_inline(artifacts)
     result = {
         "words": [],
         "lines": [],
@@ -215,7 +305,7 @@ def extract_pdfplumber_features(page, images_dir: str) -> Dict[str, Any]:
         "page_height": getattr(page, "height", None)
     }
     try:
-        words = list(page.extract_words(extra_attrs=["fontname", "size"]))
+        words = list(page.extract_words(extra_attrs=PDF_WORD_ATTRS))
         log(f"[PDFPLUMBER] {len(words)} mots détectés sur la page.")
         for w in words:
             style = infer_style(w)
@@ -240,7 +330,7 @@ def extract_pdfplumber_features(page, images_dir: str) -> Dict[str, Any]:
                 if isinstance(ann, dict) and ann.get('uri'):
                     result["hyperlinks"].append({
                         "uri": ann.get('uri'),
-                        "bbox": ann.get('rect')
+                        "bbox": [ann.get('x0', 0), ann.get('top', 0), ann.get('x1', 0), ann.get('bottom', 0)]
                     })
         except Exception:
             pass
@@ -249,12 +339,15 @@ def extract_pdfplumber_features(page, images_dir: str) -> Dict[str, Any]:
             for idx, img in enumerate(page.images):
                 x0, y0, x1, y1 = img.get("x0", 0), img.get("top", 0), img.get("x1", 0), img.get("bottom", 0)
                 try:
-                    img_crop = page.within_bbox((x0, y0, x1, y1)).to_image(resolution=300)
+                    img_crop = raster.crop_points((x0, y0, x1, y1), resolution=IMAGE_CROP_DPI)
                     img_path = os.path.join(images_dir, f"page{getattr(page, 'page_number', 1)}_img{idx+1}.png")
-                    img_crop.save(img_path, format="PNG")
+                    renderer = img_crop.info.get("renderer")
+                    # Le crop appartient ensuite au thread d'écriture
+                    artifacts.save_image(img_path, img_crop, getattr(page, "page_number", 1) - 1)
                     result["images"].append({
                         "bbox": [x0, y0, x1, y1],
-                        "image_path": img_path
+                        "image_path": img_path,
+                        "renderer": renderer
                     })
                 except Exception:
                     continue
@@ -262,25 +355,20 @@ def extract_pdfplumber_features(page, images_dir: str) -> Dict[str, Any]:
             pass
     return result
 
-def extract_words_ocr(image_path, lang='eng+fra'):
-    image = Image.open(image_path)
-    ocr_result = pytesseract.image_to_data(
-        image, lang=lang, output_type=pytesseract.Output.DICT)
+def extract_words_ocr(image, lang='eng+fra', page_ocr: PageOCR = None):
+    """
+    Mots OCR de la page ('image' : image PIL ou chemin), en pixels de l'image.
+    """
+    if page_ocr is None:
+        page_ocr = PageOCR.from_image(as_rgb(image), lang=lang)
     words = []
-    for i in range(len(ocr_result["text"])):
-        text = ocr_result["text"][i]
-        if text.strip():
-            bbox = [
-                int(ocr_result["left"][i]), int(ocr_result["top"][i]),
-                int(ocr_result["left"][i] + ocr_result["width"][i]),
-                int(ocr_result["top"][i] + ocr_result["height"][i])
-            ]
-            words.append({
-                "text": text,
-                "bbox": bbox,
-                "style": {},
-                "source": "ocr"
-            })
+    for w in page_ocr.words:
+        words.append({
+            "text": w["text"],
+            "bbox": list(w["bbox"]),
+            "style": {},
+            "source": "ocr"
+        })
     return words
 
 def cluster_words_to_lines(words, y_thresh=5):
@@ -317,7 +405,9 @@ def cluster_words_to_lines(words, y_thresh=5):
         })
     return result
 
-def group_words_by_block(words, block_bbox):
+def group_words_by_block(words, block_bbox, index: WordGridIndex = None):
+    if index is not None:
+        return [index.words[i] for i in index.query(block_bbox)]
     return [w for w in words if
             block_bbox[0] <= w["bbox"][0] <= block_bbox[2] and
             block_bbox[1] <= w["bbox"][1] <= block_bbox[3]]
@@ -342,33 +432,26 @@ def split_lines(words: List[dict], y_thresh=2.5):
         lines.append(curr_line)
     return lines
 
-def group_words_by_sentence_ultrafine(words, lang="fr"):
+def block_text(words):
+    """
+    Mots du bloc triés en ordre de lecture et texte du bloc (mots joints par un espace).
+    """
+    words_sorted = sorted(words, key=lambda w: (w['bbox'][1], w['bbox'][0]))
+    return words_sorted, " ".join(w['text'] for w in words_sorted)
+
+def group_words_by_sentence_ultrafine(words, lang="fr", spans=None):
+    """
+    Découpe les mots d'un bloc en phrases ; 'spans' : phrases déjà calculées par sentence_spans,
+    à défaut le bloc est segmenté seul.
+    """
     if not words:
         return []
-    words_sorted = sorted(words, key=lambda w: (w['bbox'][1], w['bbox'][0]))
-    text_full = " ".join(w['text'] for w in words_sorted)
-    doc = NER(text_full)
+    words_sorted, text_full = block_text(words)
+    if spans is None:
+        spans = sentence_spans([text_full])[0]
     sentences = []
-    start = 0
-    word_offsets = []
-    running = 0
-    for w in words_sorted:
-        l = len(w['text']) + (1 if running > 0 else 0)
-        word_offsets.append((running, running + l, w))
-        running += l
-    for sent in doc.sents:
-        sent_text = sent.text.strip()
-        sent_words = []
-        pointer = 0
-        for ostart, oend, w in word_offsets:
-            if pointer >= len(sent_text):
-                break
-            candidate = sent_text[pointer:pointer+len(w['text'])]
-            if candidate == w['text']:
-                sent_words.append(w)
-                pointer += len(w['text'])
-                if pointer < len(sent_text) and sent_text[pointer] == ' ':
-                    pointer += 1
+    for (sent_start, sent_end), sent_words in zip(spans, align_words_to_spans(words_sorted, spans)):
+        sent_text = text_full[sent_start:sent_end].strip()
         lines = split_lines(sent_words)
         phrase_bboxes = []
         for line in lines:
@@ -388,37 +471,26 @@ def group_words_by_sentence_ultrafine(words, lang="fr"):
     log(f"[ULTRA-FINE] {len(sentences)} phrases segmentées (mode multilignes).")
     return sentences
 
-def merge_vertical_blocks(blocks: List[Dict[str, Any]], thresh: float = 15.0) -> List[Dict[str, Any]]:
-    merged = []
-    used = [False] * len(blocks)
-    for i, blk in enumerate(blocks):
-        if used[i]:
-            continue
-        curr = blk.copy()
-        for j, other in enumerate(blocks):
-            if i == j or used[j]:
-                continue
-            if abs(curr['bbox'][0] - other['bbox'][0]) < thresh and abs(curr['bbox'][2] - other['bbox'][2]) < thresh:
-                if 0 < abs(curr['bbox'][3] - other['bbox'][1]) < 2 * thresh:
-                    curr['bbox'][3] = max(curr['bbox'][3], other['bbox'][3])
-                    used[j] = True
-        merged.append(curr)
-        used[i] = True
-    return merged
-
-def segment_blocks_layoutparser(image_path: str) -> List[Dict[str, Any]]:
-    image = Image.open(image_path).convert("RGB")
-    layout = LAYOUT_MODEL.detect(image)
-    blocks = []
-    for l in layout:
-        blocks.append({
-            "type": l.type,
-            "bbox": [l.block.x_1, l.block.y_1, l.block.x_2, l.block.y_2],
-            "score": float(l.score),
-            "text": getattr(l, "text", "")
-        })
-    blocks = merge_vertical_blocks(blocks)
-    log(f"[SEGMENT] {len(blocks)} blocs détectés par LayoutParser sur {os.path.basename(image_path)}.")
+def detect_layout_blocks(image, max_side: int = None) -> List[Dict[str, Any]]:
+    """
+    Détections brutes du modèle de mise en page (avant fusion verticale), en pixels de l'image
+    ('image' : image PIL ou chemin).
+    """
+    return detect_layout_batch([as_rgb(image)], max_side=max_side)[0]
+
+def segment_blocks_layoutparser(image, raw_blocks: List[Dict[str, Any]] = None,
+                                coords: PageCoords = None) -> List[Dict[str, Any]]:
+    """
+    Blocs de mise en page fusionnés verticalement. Avec 'coords', les détections (pixels)
+    sont converties en points PDF avant la fusion (seuil MERGE_THRESH_POINTS, indépendant du dpi).
+    """
+    if raw_blocks is None:
+        raw_blocks = detect_layout_blocks(image)
+    if coords is not None:
+        blocks = merge_vertical_blocks(coords.items_to_points(raw_blocks), thresh=MERGE_THRESH_POINTS)
+    else:
+        blocks = merge_vertical_blocks(raw_blocks)
+    log(f"[SEGMENT] {len(blocks)} blocs détectés par LayoutParser.")
     for i, b in enumerate(blocks):
         log(f"  - Bloc {i}: type={b['type']} bbox={b['bbox']} score={b['score']:.2f}")
     return blocks
@@ -427,17 +499,36 @@ def fusion_blocks(
     blocks_ia: List[Dict[str, Any]],
     features_classic: Dict[str, Any],
     tables: List[Dict[str, Any]],
-    image: Image.Image,
-    mathml_dir: str = None
+    image,
+    mathml_dir: str = None,
+    page_ocr: PageOCR = None,
+    coords: PageCoords = None,
+    page_num: int = None,
+    formulas_dir: str = None,
+    artifacts: ArtifactWriter = None
 ) -> List[Dict[str, Any]]:
+    """
+    Fusion des blocs IA avec les mots de la page (même repère, points PDF : voir ia_mode.coords).
+    Crops de formules et MathML écrits par 'artifacts' s'il est donné ; 'image' : PIL ou PageRaster.
+    """
+    artifacts = writer_or_inline(artifacts)
+    to_pixels = coords.to_pixels if coords is not None else (lambda b: b)
+    classifier = get_phrase_classifier()
     fused_blocks = []
     words = features_classic.get("words", [])
     hyperlinks = features_classic.get("hyperlinks", [])
     log(f"[FUSION] {len(blocks_ia)} blocs IA à fusionner avec {len(words)} mots détectés.")
+    # Index spatial de la page : chaque mot est assigné à un seul bloc
+    words_index = WordGridIndex(words)
+    words_by_block = assign_words_to_blocks(words, blocks_ia, index=words_index)
+    # Segmentation en phrases de tous les blocs de la page en un seul nlp.pipe
+    texts_ids = [i for i, bw in enumerate(words_by_block) if bw]
+    with stage(page_num, "sentences", blocks=len(texts_ids)):
+        page_spans = sentence_spans(block_text(words_by_block[i])[1] for i in texts_ids)
+    spans_by_block = dict(zip(texts_ids, page_spans))
     for block_id, block in enumerate(blocks_ia):
-        bx0, by0, bx1, by1 = block["bbox"]
         block_type = block.get("type", "")
-        block_words = group_words_by_block(words, block["bbox"])
+        block_words = words_by_block[block_id]
         log(f"  > Bloc {block_id} ({block_type}) bbox={block['bbox']}: {len(block_words)} mots dans le bloc.")
         block_ocr_text = ""
         block_sentences = []
@@ -449,19 +540,18 @@ def fusion_blocks(
 
         # --- Segmentation ultra-fine ---
         if block_words:
-            sentences_struct = group_words_by_sentence_ultrafine(block_words)
-            for s in sentences_struct:
+            sentences_struct = group_words_by_sentence_ultrafine(block_words, spans=spans_by_block[block_id])
+            labels = classifier.classify_many([s["phrase"] for s in sentences_struct])
+            for s, label in zip(sentences_struct, labels):
                 links = [l for l in hyperlinks if any(l.get("bbox") == b for b in s["bboxes"])]
-                mathml_str = extract_formula_mathml(s["phrase"]) if is_formula_zone(s["phrase"]) and mathml_dir else ""
+                mathml_str = extract_formula_mathml(s["phrase"]) if label["is_formula"] and mathml_dir else ""
                 content.append({
                     "phrase": s["phrase"],
                     "bboxes": s["bboxes"],
                     "words": s["words"],
                     "style": s["style"],
                     "links": links,
-                    "is_formula": is_formula_zone(s["phrase"]),
-                    "is_sigle": is_sigle(s["phrase"]),
-                    "non_translatable": is_sigle(s["phrase"]) or is_formula_zone(s["phrase"]),
+                    **label,
                     "mathml": mathml_str
                 })
                 block_ocr_text += s["phrase"] + " "
@@ -472,40 +562,48 @@ def fusion_blocks(
             log(f"    - {len(sentences_struct)} phrases extraites dans le bloc (mode ultrafine).")
         else:
             if block_type in ["Text", "Title", "List"]:
-                block_ocr_text = ocr_block(image, block["bbox"])
+                with stage(page_num, "fallback_ocr"):
+                    block_ocr_text = ocr_block(image, to_pixels(block["bbox"]), page_ocr=page_ocr)
                 block_sentences = [block_ocr_text] if block_ocr_text else []
                 log(f"    -> Fallback OCR: texte détecté: {block_ocr_text[:60]}...")
-                for s in block_sentences:
-                    mathml_str = extract_formula_mathml(s) if is_formula_zone(s) and mathml_dir else ""
+                for s, label in zip(block_sentences, classifier.classify_many(block_sentences)):
+                    mathml_str = extract_formula_mathml(s) if label["is_formula"] and mathml_dir else ""
                     content.append({
                         "phrase": s,
                         "bboxes": [block["bbox"]],
                         "words": [],
                         "style": {},
                         "links": [],
-                        "is_formula": is_formula_zone(s),
-                        "is_sigle": is_sigle(s),
-                        "non_translatable": is_sigle(s) or is_formula_zone(s),
+                        **label,
                         "mathml": mathml_str
                     })
 
         if block_type == "List":
             list_meta = detect_list_type(block_ocr_text)
 
-        if is_formula_zone(block_ocr_text):
+        block_label = classifier.classify(block_ocr_text)
+        if block_label["is_formula"]:
             latex = extract_formula_latex(block_ocr_text)
             formula_img_path = None
+            img_renderer = None
             mathml_path = None
+            # Numéro de page dans le nom : les blocs de pages différentes ne s'écrasent pas
+            formula_name = f"page{page_num+1}_formula{block_id+1}" if page_num is not None else f"formula{block_id+1}"
+            # Chemins notés seulement une fois le fichier soumis (écrivain privé : écrit, sinon exception)
             try:
-                crop = image.crop((bx0, by0, bx1, by1))
-                dirs = os.path.dirname(image.filename)
-                formula_img_path = os.path.join(dirs, f"formula_{block_id+1}_page.png")
-                crop.save(formula_img_path)
+                if formulas_dir:
+                    crop = image.crop(tuple(to_pixels(block["bbox"])))
+                    img_path = os.path.join(formulas_dir, f"{formula_name}.png")
+                    # Crop du rendu pleine page (poppler) ou rendu de la seule région (pdfium), voir PageRaster
+                    renderer = crop.info.get("renderer")
+                    # Le crop appartient ensuite au thread d'écriture
+                    artifacts.save_image(img_path, crop, page_num)
+                    formula_img_path, img_renderer = img_path, renderer
                 if mathml_dir:
                     mathml_str = extract_formula_mathml(block_ocr_text)
-                    mathml_path = os.path.join(mathml_dir, f"formula_{block_id+1}_page.xml")
-                    with open(mathml_path, "w", encoding="utf8") as fxml:
-                        fxml.write(mathml_str)
+                    xml_path = os.path.join(mathml_dir, f"{formula_name}.xml")
+                    artifacts.write_text(xml_path, mathml_str, page_num)
+                    mathml_path = xml_path
                 log(f"    - Formule détectée: latex={latex}, img={formula_img_path}, mathml={mathml_path}")
             except Exception as e:
                 log(f"    [WARN] Sauvegarde formule échouée: {e}")
@@ -513,6 +611,7 @@ def fusion_blocks(
                 "is_formula": True,
                 "latex": latex,
                 "img_path": formula_img_path,
+                "img_renderer": img_renderer,
                 "mathml_path": mathml_path
             }
 
@@ -521,16 +620,18 @@ def fusion_blocks(
             "type": block_type,
             "bbox": block.get("bbox", [0,0,0,0]),
             "score": block.get("score", 1.0),
+            # Indices des détections brutes de mise en page réunies dans ce bloc (merge_vertical_blocks)
+            "merged_from": list(block.get("merged_from", [])),
             "ocr_text": block_ocr_text,
             "sentences": block_sentences,
             "style": block_style,
             "alignment": block_alignment,
             "list_meta": list_meta,
             "formula_data": formula_data,
-            "sigle": is_sigle(block_ocr_text),
+            "sigle": block_label["is_sigle"],
             "content": content,
             "hyperlinks": [],
-            "non_translatable": is_sigle(block_ocr_text) or bool(formula_data),
+            "non_translatable": block_label["is_sigle"] or bool(formula_data),
         }
 
         for c in content:
@@ -540,11 +641,18 @@ def fusion_blocks(
     log(f"[FUSION] => {len(fused_blocks)} blocs fusionnés sur la page.")
     return fused_blocks
 
-def build_page_json(page_num, width, height, fused_blocks, logical_structure=None, lines_extracted=None):
+def build_page_json(page_num, width, height, fused_blocks, logical_structure=None, lines_extracted=None, coords=None,
+                    ocr=None):
     return {
         "page_num": page_num + 1,
         "width": width,
         "height": height,
+        # Toutes les bbox de la page sont dans ce repère ; dpi / image_size permettent de repasser en pixels
+        "coord_space": COORD_SPACE,
+        "dpi": coords.dpi if coords is not None else None,
+        "image_size": [coords.image_width, coords.image_height] if coords is not None else None,
+        # Décision d'OCR sélectif (ia_mode.page_classifier.ocr_decision)
+        "ocr": ocr,
         "blocks": fused_blocks,
         "logical_structure": logical_structure or [],
         "lines_extracted": lines_extracted or []
@@ -583,90 +691,788 @@ def export_lines_to_csv_txt(all_pages_json, export_dir, base_name="lines_extract
                 ft.write(line["text"].strip() + "\n")
     log(f"[EXPORT] Lignes exportées : {lines_csv_path}, {lines_txt_path}")
 
-def extract_all(
+# === CACHE DE PAGES ===
+_VERSIONS = {}
+
+def _tesseract_version() -> str:
+    if "tesseract" not in _VERSIONS:
+        try:
+            _VERSIONS["tesseract"] = tesseract_version()
+        except Exception:
+            _VERSIONS["tesseract"] = "unknown"
+    return _VERSIONS["tesseract"]
+
+def _poppler_version() -> str:
+    # Version de pdftoppm (poppler), celui qu'appelle pdf2image : "pdftoppm version 22.02.0"
+    if "poppler" not in _VERSIONS:
+        try:
+            import subprocess
+            out = subprocess.run(["pdftoppm", "-v"], capture_output=True, text=True, timeout=10)
+            _VERSIONS["poppler"] = (out.stderr or out.stdout).splitlines()[0].split()[-1]
+        except Exception:
+            _VERSIONS["poppler"] = "unknown"
+    return _VERSIONS["poppler"]
+
+def _file_signature(path: str) -> str:
+    try:
+        st = os.stat(path)
+        return f"{st.st_size}-{int(st.st_mtime)}"
+    except OSError:
+        return "missing"
+
+def page_image_params(dpi: int) -> Dict[str, Any]:
+    return {"dpi": dpi, "poppler": _poppler_version()}
+
+def ocr_stage_params(dpi: int, lang: str) -> Dict[str, Any]:
+    return {"dpi": dpi, "lang": lang, "tesseract": _tesseract_version()}
+
+def layout_stage_params(dpi: int, max_side: int = None) -> Dict[str, Any]:
+    return {
+        "dpi": dpi,
+        "max_side": max_side,
+        "config": CONFIG_PATH,
+        "weights": _file_signature(LAYOUT_MODEL_PATH),
+        "score_thresh": LAYOUT_SCORE_THRESH,
+        "label_map": LAYOUT_LABEL_MAP,
+    }
+
+def has_cached_page_image(cache: PageCache, page_hash: str, dpi: int) -> bool:
+    if cache is None or page_hash is None:
+        return False
+    return cache.has(cache.key(page_hash, "image", page_image_params(dpi)), "image", "png")
+
+def load_cached_page_image(cache: PageCache, page_hash: str, dpi: int):
+    if cache is None or page_hash is None:
+        return None
+    return cache.get_image(cache.key(page_hash, "image", page_image_params(dpi)))
+
+def store_page_image(cache: PageCache, page_hash: str, dpi: int, image: Image.Image):
+    if cache is None or page_hash is None:
+        return
+    try:
+        cache.put_image(cache.key(page_hash, "image", page_image_params(dpi)), image)
+    except Exception as e:
+        log(f"[CACHE] Image de page non mise en cache : {e}")
+
+def signals_stage_params() -> Dict[str, Any]:
+    return {"word_attrs": PDF_WORD_ATTRS}
+
+def page_ocr_signals(page, cache: PageCache = None, page_hash: str = None, n_words: int = None) -> Dict[str, Any]:
+    """
+    Signaux de l'OCR sélectif (ia_mode.page_classifier.page_signals), calculés une fois par page
+    (mots comptés comme dans extract_pdfplumber_features) et gardés dans le cache de pages.
+    """
+    def compute():
+        count = n_words if n_words is not None else len(page.extract_words(extra_attrs=PDF_WORD_ATTRS))
+        return page_signals(page, n_words=count)
+    return cached_stage(cache, "signals", page_hash, signals_stage_params(), compute)
+
+def needs_full_render(page, dpi: int, cache: PageCache = None, page_hash: str = None,
+                      layout_max_side: int = None, save_png: bool = True, ocr_mode: str = "auto") -> bool:
+    """
+    Rendu pleine page nécessaire ? Non pour une page texte sans PNG d'aperçu dont mise en page et
+    signaux sont en cache (simples lectures du cache) : ses crops sont rendus région par région.
+    """
+    if save_png or ocr_mode == "always" or cache is None or page_hash is None:
+        return True
+    if lookup_stage(cache, "layout", page_hash, layout_stage_params(dpi, layout_max_side)) is None:
+        return True
+    signals = lookup_stage(cache, "signals", page_hash, signals_stage_params())
+    if signals is None:
+        return True
+    return ocr_decision(page, mode=ocr_mode, signals=signals)["run_ocr"]
+
+def analyze_page(
+    page,
+    page_num: int,
+    page_image: Image.Image,
+    dirs: Dict[str, str],
+    dpi: int = 300,
+    cache: PageCache = None,
+    page_hash: str = None,
+    raw_blocks: List[Dict[str, Any]] = None,
+    layout_max_side: int = None,
+    save_png: bool = True,
+    png_compress_level: int = PNG_COMPRESS_LEVEL,
+    artifacts: ArtifactWriter = None,
+    ocr_mode: str = "auto"
+) -> Dict[str, Any]:
+    """
+    Première phase : mots pdfplumber + OCR (selon ocr_mode), lignes, blocs (cache, 'raw_blocks' par lot).
+    page_image=None : crops rendus région par région. Retourne l'état à passer à finish_page().
+    """
+    log(f"\n[PAGE {page_num+1}] === Extraction début ===")
+    artifacts = writer_or_inline(artifacts)
+    if cache is not None and page_hash is None:
+        page_hash = page_content_hash(page)
+    raster = PageRaster(page, dpi=dpi, image=as_rgb(page_image) if page_image is not None else None)
+    layout_params = layout_stage_params(dpi, layout_max_side)
+    if raw_blocks is None and not raster.has_image:
+        raw_blocks = lookup_stage(cache, "layout", page_hash, layout_params)
+    if save_png:
+        with stage(page_num, "save_png"):
+            artifacts.save_image(
+                # Copie : le thread d'écriture ne partage pas l'image que l'OCR et les crops lisent encore
+                os.path.join(dirs["images"], f"page_{page_num+1}.png"), raster.image.copy(), page_num,
+                compress_level=png_compress_level
+            )
+    with stage(page_num, "pdfplumber") as counts:
+        features = extract_pdfplumber_features(page, dirs["images"], raster=raster, artifacts=artifacts)
+        counts["words"] = len(features["words"])
+    with stage(page_num, "classify") as counts:
+        signals = page_ocr_signals(page, cache, page_hash, n_words=len(features["words"]))
+        ocr = ocr_decision(page, mode=ocr_mode, signals=signals)
+        counts[ocr["page_kind"]] = 1
+    log(f"[OCR] page {ocr['page_kind']} ({ocr['reason']}), OCR pleine page : {ocr['run_ocr']}")
+    # Rendu pleine page seulement si l'OCR ou la mise en page en ont besoin
+    pil_image = raster.image if (ocr["run_ocr"] or raw_blocks is None) else None
+    # Repère commun de la page : points PDF (pdfplumber) ; OCR et mise en page y sont convertis
+    coords = raster.coords
+    pdf_words = features["words"] if ocr["use_text_layer"] else []
+    page_ocr = None
+    ocr_words = []
+    if ocr["run_ocr"]:
+        # Un seul passage Tesseract pleine page : mots OCR + cache pour l'OCR de repli des blocs
+        with stage(page_num, "ocr") as counts:
+            page_ocr = cached_stage(
+                cache, "ocr", page_hash, ocr_stage_params(dpi, "eng+fra"),
+                lambda: PageOCR.from_image(pil_image, lang="eng+fra"),
+                encode=lambda o: o.data, decode=lambda d: PageOCR(d, lang="eng+fra")
+            )
+            ocr_words = coords.items_to_points(extract_words_ocr(pil_image, page_ocr=page_ocr))
+            counts["words"] = len(ocr_words)
+    # Appariement IoU + texte dans l'espace PDF : un mot vu par les deux sources n'est gardé qu'une fois
+    with stage(page_num, "word_merge") as counts:
+        features["words"] = merge_words(pdf_words, ocr_words)
+        counts["words"] = len(features["words"])
+    n_ocr_only = len(features["words"]) - len(pdf_words)
+    log(f"[FUSION WORDS] pdfplumber={len(pdf_words)}, ocr={len(ocr_words)}, ocr-only={n_ocr_only}")
+
+    # CLUSTERING LIGNES (bottom-up)
+    with stage(page_num, "lines") as counts:
+        lines_extracted = cluster_words_to_lines(features["words"], y_thresh=5)
+        counts["lines"] = len(lines_extracted)
+    features["lines_extracted"] = lines_extracted
+
+    if raw_blocks is None:
+        with stage(page_num, "layout", pages=1):
+            raw_blocks = cached_stage(
+                cache, "layout", page_hash, layout_params,
+                lambda: detect_layout_blocks(pil_image, max_side=layout_max_side)
+            )
+    with stage(page_num, "segment") as counts:
+        blocks_ia = segment_blocks_layoutparser(pil_image, raw_blocks=raw_blocks, coords=coords)
+        counts["blocks"] = len(blocks_ia)
+    if not blocks_ia:
+        log("[SEGMENT] Aucun bloc IA détecté, fallback full-page.")
+        blocks_ia = [{
+            "type": "Text",
+            "bbox": [0, 0, coords.page_width, coords.page_height],
+            "score": 1.0,
+            "text": "",
+        }]
+    log(f"[RASTER] rendus pleine page={raster.full_renders}, régions={raster.region_renders}")
+    return {
+        "page_num": page_num,
+        "image": raster,
+        "features": features,
+        "page_ocr": page_ocr,
+        "ocr": ocr,
+        "coords": coords,
+        "blocks_ia": blocks_ia,
+        "has_table": any(b.get("type") == "Table" for b in blocks_ia),
+    }
+
+def write_page_file(page_json: Dict[str, Any], json_dir: str, page_format: str = "json",
+                    artifacts: ArtifactWriter = None) -> str:
+    """
+    Écrit le fichier de page : json/page_N.json (indenté) ou json/page_N.vpk (format compact,
+    voir ia_mode.page_format), par 'artifacts' s'il est donné (page_json ne doit plus être modifié).
+    """
+    page_index = page_json["page_num"] - 1
+    artifacts = writer_or_inline(artifacts)
+    if page_format == "compact":
+        path = os.path.join(json_dir, f"page_{page_json['page_num']}{COMPACT_EXT}")
+        artifacts.submit(path, lambda tmp: write_compact_page(page_json, tmp), page_index)
+        return path
+    path = os.path.join(json_dir, f"page_{page_json['page_num']}.json")
+    artifacts.write_json(path, page_json, indent=2, page_num=page_index)
+    return path
+
+def finish_page(state: Dict[str, Any], raw_tables: List[Dict[str, Any]], dirs: Dict[str, str],
+                page_format: str = "json", artifacts: ArtifactWriter = None) -> Dict[str, Any]:
+    """
+    Seconde phase : tableaux, fusion des blocs, fichier de page (json/page_N.json ou .vpk).
+    Retourne le JSON de la page.
+    """
+    page_num = state["page_num"]
+    features = state["features"]
+    coords = state["coords"]
+    # bbox camelot : origine en bas de page -> repère de la page
+    raw_tables = [dict(t, bbox=coords.from_bottom_left(t.get("bbox"))) for t in raw_tables]
+    with stage(page_num, "write_tables", tables=len(raw_tables)):
+        tables = write_tables(raw_tables, page_num, dirs["tables"], dirs["htmltables"], artifacts=artifacts)
+    with stage(page_num, "fusion") as counts:
+        fused_blocks = fusion_blocks(
+            state["blocks_ia"], features, tables, state["image"], dirs["mathml"],
+            page_ocr=state["page_ocr"], coords=coords, page_num=page_num,
+            formulas_dir=dirs["formulas"], artifacts=artifacts
+        )
+        counts["blocks"] = len(fused_blocks)
+        counts["sentences"] = sum(len(b["content"]) for b in fused_blocks)
+    if isinstance(state["image"], PageRaster):
+        state["image"].close()
+    page_json = build_page_json(
+        page_num,
+        features.get("page_width"),
+        features.get("page_height"),
+        fused_blocks,
+        logical_structure=None,
+        lines_extracted=features["lines_extracted"],
+        coords=coords,
+        ocr=state.get("ocr")
+    )
+    with stage(page_num, "write_page"):
+        json_path = write_page_file(page_json, dirs["json"], page_format, artifacts=artifacts)
+    log(f"[SAVE] JSON écrit : {json_path}")
+    return page_json
+
+def extract_page(
     pdf_path: str,
-    max_pages: int = None,
-    start_page: int = 1,
-    end_page: int = None,
-    pages: list = None,
-    export_json_pickle: bool = True,
+    page,
+    page_num: int,
+    page_image: Image.Image,
+    dirs: Dict[str, str],
+    dpi: int = 300,
+    cache: PageCache = None,
+    page_hash: str = None,
+    table_stage: TableStage = None,
+    layout_max_side: int = None,
+    page_format: str = "json",
+    save_png: bool = True,
+    png_compress_level: int = PNG_COMPRESS_LEVEL,
+    artifacts: ArtifactWriter = None,
+    ocr_mode: str = "auto"
+) -> Dict[str, Any]:
+    """
+    Extraction complète d'une page déjà rendue (analyze_page puis finish_page) ; camelot seulement
+    si un bloc Table a été détecté. Lève une exception en cas d'échec.
+    """
+    if cache is not None and page_hash is None:
+        page_hash = page_content_hash(page)
+    state = analyze_page(
+        page, page_num, page_image, dirs, dpi=dpi, cache=cache, page_hash=page_hash,
+        layout_max_side=layout_max_side, save_png=save_png, png_compress_level=png_compress_level,
+        artifacts=artifacts, ocr_mode=ocr_mode
+    )
+    raw_tables = []
+    if state["has_table"]:
+        table_stage = table_stage or TableStage(pdf_path, cache=cache, page_hashes={page_num: page_hash})
+        with stage(page_num, "tables"):
+            raw_tables = table_stage.get(page_num)
+    return finish_page(state, raw_tables, dirs, page_format=page_format, artifacts=artifacts)
+
+@dataclass
+class ExtractionOptions:
+    """
+    Paramètres d'extract_all, regroupés par étape.
+    """
+    # Pages à extraire (voir resolve_pages_range)
+    max_pages: int = None
+    start_page: int = 1
+    end_page: int = None
+    pages: list = None
+    # Rendu (PageRasterizer) ; workers > 1 : pool de processus, une page par tâche
+    dpi: int = 300
+    raster_threads: int = 1
+    raster_batch_size: int = 8
+    raster_queue_size: int = 4
+    workers: int = 1
+    # Cache disque des étapes par page (ia_mode.page_cache)
+    cache_dir: str = None
+    cache_max_mb: int = 2048
+    # Mode série : mise en page par fenêtres de pages, lectures camelot par paquets de pages à tableau
+    window_size: int = 4
+    layout_batch_size: int = 4
+    layout_torch_threads: int = None
+    layout_max_side: int = None
+    table_chunk_size: int = 8
+    table_workers: int = 0
+    # OCR pleine page : "auto" (pages scannées ou hybrides), "always" ou "never"
+    ocr_mode: str = "auto"
+    # Sorties : fichiers de page ("json" ou "compact"), exports document, aperçus PNG
+    page_format: str = "json"
+    export_json_pickle: bool = False
     base_export_name: str = "extraction_doc"
-) -> None:
-    from tqdm import tqdm
+    save_page_images: bool = True
+    png_compress_level: int = PNG_COMPRESS_LEVEL
+    artifact_workers: int = ARTIFACT_WORKERS
+    # Manifeste (reprise, tentatives par page) et mesures (export/metrics.jsonl, callback)
+    resume: bool = False
+    max_retries: int = 1
+    metrics: bool = True
+    metrics_callback: Any = None
+
+    @property
+    def cache_max_bytes(self) -> int:
+        return int(self.cache_max_mb * 1024 * 1024) if self.cache_max_mb else None
+
+    @property
+    def max_attempts(self) -> int:
+        return 1 + max(0, self.max_retries)
+
+    def run_params(self, pdf_path: str) -> Dict[str, Any]:
+        # Paramètres qui changent le contenu des pages : une reprise exige les mêmes
+        return {"pdf": os.path.abspath(pdf_path), "dpi": self.dpi, "layout_max_side": self.layout_max_side,
+                "page_format": self.page_format, "ocr_mode": self.ocr_mode, "pages": self.pages,
+                "start_page": self.start_page, "end_page": self.end_page, "max_pages": self.max_pages}
+
+    def page_kwargs(self) -> Dict[str, Any]:
+        # Arguments de render_and_extract_page communs à toutes les pages
+        return {"dpi": self.dpi, "layout_max_side": self.layout_max_side, "page_format": self.page_format,
+                "save_png": self.save_page_images, "png_compress_level": self.png_compress_level,
+                "ocr_mode": self.ocr_mode}
+
+# === MODE MULTIPROCESSUS ===
+# État propre à chaque processus worker (PDF ouvert une seule fois par worker).
+_WORKER_STATE = {}
+
+def _init_extraction_worker(pdf_path: str, dirs: Dict[str, str], options: ExtractionOptions, torch_threads: int):
     import pdfplumber
+    # Limite les threads intra-op pour ne pas sur-souscrire les coeurs entre workers
+    try:
+        import torch
+        torch.set_num_threads(max(1, torch_threads))
+    except Exception:
+        pass
+    # Chargement unique des modèles par worker, avant la première page
+    warmup_models()
+    _WORKER_STATE["pdf"] = pdfplumber.open(pdf_path)
+    _WORKER_STATE["pdf_path"] = pdf_path
+    _WORKER_STATE["dirs"] = dirs
+    _WORKER_STATE["options"] = options
+    _WORKER_STATE["cache"] = PageCache(options.cache_dir, max_bytes=options.cache_max_bytes) if options.cache_dir else None
+    _WORKER_STATE["artifacts"] = ArtifactWriter(workers=options.artifact_workers)
+    # Mesures gardées en mémoire et renvoyées avec chaque page au processus principal
+    set_recorder(MetricsRecorder())
 
-    dirs = make_output_dirs(pdf_path)
-    images_dir = dirs["images"]
-    tables_dir = dirs["tables"]
-    json_dir = dirs["json"]
-    mathml_dir = dirs["mathml"]
-    htmltables_dir = dirs["htmltables"]
-    export_dir = dirs["export"]
+def render_and_extract_page(pdf_path: str, pdf, page_num: int, dirs: Dict[str, str], dpi: int = 300,
+                            cache: PageCache = None, layout_max_side: int = None,
+                            page_format: str = "json", save_png: bool = True,
+                            png_compress_level: int = PNG_COMPRESS_LEVEL,
+                            artifacts: ArtifactWriter = None, ocr_mode: str = "auto") -> Dict[str, Any]:
+    """
+    Rendu isolé d'une page (ou image du cache) puis extract_page : workers et reprises de pages.
+    Pas de rendu pleine page si needs_full_render() l'écarte.
+    """
+    page = pdf.pages[page_num]
+    page_hash = page_content_hash(page) if cache is not None else None
+    page_image = None
+    if needs_full_render(page, dpi, cache, page_hash, layout_max_side, save_png, ocr_mode):
+        with stage(page_num, "render"):
+            page_image = load_cached_page_image(cache, page_hash, dpi)
+            if page_image is None:
+                page_image = extract_page_image_in_memory(pdf_path, page_num, dpi)
+                store_page_image(cache, page_hash, dpi, page_image)
+    return extract_page(
+        pdf_path, page, page_num, page_image, dirs,
+        dpi=dpi, cache=cache, page_hash=page_hash, layout_max_side=layout_max_side,
+        page_format=page_format, save_png=save_png, png_compress_level=png_compress_level,
+        artifacts=artifacts, ocr_mode=ocr_mode
+    )
 
-    all_pages_json = []
+def _extract_page_worker(page_num: int):
+    t0 = time.perf_counter()
+    try:
+        page_json = render_and_extract_page(
+            _WORKER_STATE["pdf_path"], _WORKER_STATE["pdf"], page_num, _WORKER_STATE["dirs"],
+            cache=_WORKER_STATE["cache"], artifacts=_WORKER_STATE["artifacts"],
+            **_WORKER_STATE["options"].page_kwargs()
+        )
+        error = None
+    except Exception as e:
+        page_json, error = None, f"{type(e).__name__}: {e}"
+    # Fichiers de la page écrits avant de la déclarer terminée ; leurs erreurs suivent le résultat
+    write_errors = _WORKER_STATE["artifacts"].flush()
+    return page_num, page_json, error, time.perf_counter() - t0, get_recorder().take_events(), write_errors
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-        if pages:
-            pages_range = [p-1 for p in pages if 1 <= p <= total_pages]
+def page_file_name(page_num: int, page_format: str = "json") -> str:
+    return f"page_{page_num+1}{COMPACT_EXT if page_format == 'compact' else '.json'}"
+
+def rebuild_exports(dirs: Dict[str, str], manifest: ExtractionManifest, page_nums: List[int],
+                    base_export_name: str = "extraction_doc", page_format: str = "json") -> str:
+    """
+    Reconstruit export/<base>.ndjson (et .vpk) depuis les fichiers notés terminés dans le manifeste.
+    """
+    stream_path = os.path.join(dirs["export"], f"{base_export_name}.ndjson")
+    compact_doc = None
+    if page_format == "compact":
+        compact_doc = CompactWriter(os.path.join(dirs["export"], f"{base_export_name}{COMPACT_EXT}"))
+    with PageStreamWriter(stream_path) as stream:
+        for page_num in page_nums:
+            path = manifest.done_file(page_num + 1, dirs["base"])
+            if path is None or not os.path.exists(path):
+                continue
+            page_json = load_page(path)
+            stream.write(page_json)
+            if compact_doc is not None:
+                compact_doc.write(page_json)
+    if compact_doc is not None:
+        compact_doc.close()
+    return stream_path
+
+def resolve_pages_range(total_pages: int, max_pages: int = None, start_page: int = 1, end_page: int = None, pages: list = None) -> List[int]:
+    if pages:
+        return [p-1 for p in pages if 1 <= p <= total_pages]
+    start_idx = max(0, start_page - 1)
+    end_idx = end_page if end_page is not None else total_pages
+    end_idx = min(end_idx, total_pages)
+    pages_range = list(range(start_idx, end_idx))
+    if max_pages is not None:
+        pages_range = pages_range[:max_pages]
+    return pages_range
+
+class _ExtractionRun:
+    """
+    Suivi d'une extraction : manifeste, exports document, mesures et fichiers de pages.
+    """
+
+    def __init__(self, pdf_path: str, options: ExtractionOptions):
+        self.pdf_path = pdf_path
+        self.options = options
+        self.dirs = make_output_dirs(pdf_path)
+        self.stream_path = os.path.join(self.dirs["export"], f"{options.base_export_name}.ndjson")
+        self.cache = PageCache(options.cache_dir, max_bytes=options.cache_max_bytes) if options.cache_dir else None
+        self.resume = options.resume
+        self.manifest_path = os.path.join(self.dirs["base"], MANIFEST_NAME)
+        self.manifest = self._open_manifest()
+        self.recorder = self._open_recorder()
+        # En reprise, les exports document sont reconstruits à la fin depuis les fichiers de pages
+        self.stream = None if self.resume else PageStreamWriter(self.stream_path)
+        self.compact_doc = None
+        if options.page_format == "compact" and not self.resume:
+            self.compact_doc = CompactWriter(os.path.join(self.dirs["export"], f"{options.base_export_name}{COMPACT_EXT}"))
+        self.artifacts = ArtifactWriter(workers=options.artifact_workers)
+        self.page_seconds = {}
+
+    def _open_manifest(self) -> ExtractionManifest:
+        run_params = self.options.run_params(self.pdf_path)
+        if self.resume and os.path.exists(self.manifest_path):
+            previous = ExtractionManifest(self.manifest_path).runs
+            if previous and previous[-1].get("params") != run_params:
+                # Pages extraites avec d'autres paramètres : pas de mélange, extraction complète
+                log(f"[RESUME] Paramètres différents de l'extraction précédente ({previous[-1].get('params')}) : "
+                    f"reprise impossible, extraction depuis le début.")
+                self.resume = False
+        if not self.resume and os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+        manifest = ExtractionManifest(self.manifest_path)
+        manifest.start_run(run_params)
+        return manifest
+
+    def _open_recorder(self) -> MetricsRecorder:
+        options = self.options
+        if not options.metrics and options.metrics_callback is None:
+            return None
+        metrics_path = os.path.join(self.dirs["export"], METRICS_NAME) if options.metrics else None
+        if metrics_path and not self.resume and os.path.exists(metrics_path):
+            os.remove(metrics_path)
+        return MetricsRecorder(metrics_path, callback=options.metrics_callback)
+
+    def pages_todo(self, pages_range: List[int]) -> List[int]:
+        if not self.resume:
+            return pages_range
+        manifest = self.manifest
+        # Pages en échec : seulement celles qui n'ont pas épuisé leurs tentatives
+        retryable = set(manifest.retryable([p + 1 for p in pages_range], self.options.max_attempts))
+        pages_todo = [p for p in pages_range if not manifest.is_done(p + 1, self.dirs["base"])
+                      and (manifest.status(p + 1) != "failed" or p + 1 in retryable)]
+        exhausted = sum(1 for p in pages_range if manifest.status(p + 1) == "failed" and p + 1 not in retryable)
+        log(f"[RESUME] {len(pages_range) - len(pages_todo) - exhausted} pages déjà extraites, "
+            f"{exhausted} en échec définitif, {len(pages_todo)} à traiter.")
+        return pages_todo
+
+    def emit(self, page_json: Dict[str, Any], page_num: int, in_order: bool = True):
+        if in_order and self.stream is not None:
+            self.stream.write(page_json)
+            if self.compact_doc is not None:
+                self.compact_doc.write(page_json)
+        seconds = self.page_seconds.pop(page_num, 0.0)
+        self.manifest.mark_done(page_num + 1, seconds,
+                                file=os.path.join("json", page_file_name(page_num, self.options.page_format)))
+        if self.recorder is not None:
+            self.recorder.page_done(
+                page_num, seconds,
+                blocks=len(page_json.get("blocks", [])),
+                lines=len(page_json.get("lines_extracted", [])),
+                ocr=int(bool((page_json.get("ocr") or {}).get("run_ocr"))),
+                page_kind=(page_json.get("ocr") or {}).get("page_kind")
+            )
+
+    def fail(self, page_num: int, error):
+        log(f"[WARN] Extraction skipped for page {page_num+1}: {error}")
+        self.manifest.mark_failed(page_num + 1, f"{type(error).__name__}: {error}" if isinstance(error, Exception) else error,
+                                  self.page_seconds.pop(page_num, None))
+
+    def report_write_errors(self, errors: List[Dict[str, Any]]):
+        for e in errors:
+            log(f"[WARN] Fichier non écrit ({e['path']}) : {e['error']}")
+            page = e["page"] + 1 if e["page"] is not None else None
+            self.manifest.note_artifact_error(page, os.path.relpath(e["path"], self.dirs["base"]), e["error"])
+
+    def timed(self, page_num: int, fn, *args, **kwargs):
+        # Temps passé sur la page, cumulé sur ses étapes (rendu, analyse, fin de page)
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.page_seconds[page_num] = self.page_seconds.get(page_num, 0.0) + time.perf_counter() - t0
+
+    def run_pool(self, pages_todo: List[int]):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from tqdm import tqdm
+        n_workers = min(self.options.workers, len(pages_todo))
+        torch_threads = max(1, (os.cpu_count() or 1) // n_workers)
+        # Le callback de mesures reste dans le processus principal (événements renvoyés avec chaque page)
+        worker_options = replace(self.options, metrics_callback=None)
+        # "spawn" : pas de fork d'un processus qui a déjà initialisé torch / ses threads
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_extraction_worker,
+            initargs=(self.pdf_path, self.dirs, worker_options, torch_threads)
+        ) as executor:
+            # map() rend les résultats dans l'ordre de soumission : ordre des pages garanti
+            results = executor.map(_extract_page_worker, pages_todo)
+            for page_num, page_json, error, seconds, events, write_errors in tqdm(
+                    results, total=len(pages_todo), desc="Extraction pages"):
+                self.page_seconds[page_num] = seconds
+                if self.recorder is not None:
+                    for event in events:
+                        self.recorder.emit(event)
+                self.report_write_errors(write_errors)
+                if error:
+                    self.fail(page_num, error)
+                    continue
+                self.emit(page_json, page_num)
+
+    def retry_failed(self, pdf, pages_todo: List[int]) -> bool:
+        # Pages en échec retentées une par une (rendu isolé), tant qu'il leur reste des
+        # tentatives (comptées dans le manifeste, extractions précédentes comprises)
+        retried = False
+        while True:
+            retry = [p - 1 for p in self.manifest.retryable([p + 1 for p in pages_todo], self.options.max_attempts)]
+            if not retry:
+                return retried
+            log(f"[RETRY] {len(retry)} pages en échec retentées.")
+            for page_num in retry:
+                try:
+                    page_json = self.timed(
+                        page_num, render_and_extract_page, self.pdf_path, pdf, page_num, self.dirs,
+                        cache=self.cache, artifacts=self.artifacts, **self.options.page_kwargs()
+                    )
+                    self.emit(page_json, page_num, in_order=False)
+                    retried = True
+                except Exception as e:
+                    self.fail(page_num, e)
+            # Fichiers des pages reprises présents avant la reconstruction des exports
+            self.report_write_errors(self.artifacts.flush())
+
+    def finish(self, pages_range: List[int], retried: bool):
+        options = self.options
+        export_dir = self.dirs["export"]
+        self.artifacts.close()
+        for writer in (self.stream, self.compact_doc):
+            if writer is not None:
+                writer.close()
+        with recording(self.recorder), stage(None, "export"):
+            if self.resume or retried:
+                # Exports reconstruits dans l'ordre des pages depuis json/page_N.*
+                rebuild_exports(self.dirs, self.manifest, pages_range, options.base_export_name, options.page_format)
+            pages_stream = PageStreamReader(self.stream_path)
+            if options.export_json_pickle:
+                export_document_json_pickle(list(pages_stream), export_dir, base_name=options.base_export_name)
+            export_lines_to_csv_txt(pages_stream, export_dir, base_name="lines_extracted")
+        summary = self.manifest.summary()
+        log(f"[CHECKPOINT] {summary['status']}, fichiers en échec : {summary['artifact_errors']} ({self.manifest_path})")
+        if options.export_json_pickle:
+            log(f"Export global JSON/Pickle : {export_dir}/{options.base_export_name}.json et .pkl")
+        log(f"\nExtraction complète : {self.dirs['json']}/page_X.json (et images/tables/formules associés)")
+        log(f"Export pages NDJSON : {self.stream_path} ({len(pages_stream)} pages)")
+        log(f"Export lignes CSV/TXT : {export_dir}/lines_extracted.csv et .txt")
+        if self.cache is not None:
+            log(f"[CACHE] {self.cache.hits} lectures, {self.cache.misses} absences ({self.cache.root})")
+        if self.recorder is not None:
+            self.recorder.close()
+            if self.recorder.path:
+                log(f"[METRICS] {self.recorder.path} (rapport : python -m ia_mode.metrics {export_dir})")
+
+class _SerialDriver:
+    """
+    Mode série : rendu en tâche de fond, mise en page par fenêtres, tableaux par paquets de pages.
+    """
+
+    def __init__(self, extraction: _ExtractionRun, pdf, pages_todo: List[int]):
+        self.extraction = extraction
+        self.options = options = extraction.options
+        self.pdf = pdf
+        self.pages_todo = pages_todo
+        cache = extraction.cache
+        # Pages déjà rendues dans le cache : seules les autres passent par le rendu
+        self.page_hashes = {p: page_content_hash(pdf.pages[p]) for p in pages_todo} if cache else {}
+        # Pages texte dont la mise en page est en cache : pas de rendu pleine page
+        self.region_pages = set(p for p in pages_todo if cache and not needs_full_render(
+            pdf.pages[p], options.dpi, cache, self.page_hashes.get(p), options.layout_max_side,
+            options.save_page_images, options.ocr_mode))
+        self.cached_pages = set(p for p in pages_todo if p not in self.region_pages
+                                and has_cached_page_image(cache, self.page_hashes.get(p), options.dpi))
+        self.window = []
+        # Pages analysées en attente de leurs tableaux, dans l'ordre des pages : les lectures
+        # camelot sont regroupées sur plusieurs fenêtres, par paquets de 'table_chunk_size' pages
+        self.deferred = []
+        self.max_deferred = max(options.window_size, 2 * options.table_chunk_size)
+        self.table_stage = None
+
+    def run(self):
+        from tqdm import tqdm
+        options, extraction = self.options, self.extraction
+        to_render = [p for p in self.pages_todo if p not in self.cached_pages and p not in self.region_pages]
+        # Rendu au niveau document : un processus poppler par lot de pages, en avance sur l'OCR
+        rasterizer = PageRasterizer(
+            extraction.pdf_path, to_render, dpi=options.dpi, thread_count=options.raster_threads,
+            batch_size=options.raster_batch_size, queue_size=options.raster_queue_size
+        )
+        self.table_stage = TableStage(
+            extraction.pdf_path, chunk_size=options.table_chunk_size, workers=options.table_workers,
+            cache=extraction.cache, page_hashes=self.page_hashes
+        )
+        with rasterizer, self.table_stage:
+            rendered = iter(rasterizer)
+            for page_num in tqdm(self.pages_todo, desc="Extraction pages"):
+                t0 = time.perf_counter()
+                try:
+                    page_image = self.page_image(page_num, rasterizer, rendered)
+                    extraction.page_seconds[page_num] = time.perf_counter() - t0
+                    self.window.append((page_num, page_image))
+                except Exception as e:
+                    extraction.page_seconds[page_num] = time.perf_counter() - t0
+                    extraction.fail(page_num, e)
+                    continue
+                if len(self.window) >= max(1, options.window_size):
+                    self.process_window()
+            self.process_window()
+            self.finish_deferred(final=True)
+
+    def page_image(self, page_num: int, rasterizer: PageRasterizer, rendered):
+        if page_num in self.region_pages:
+            return None
+        cache, dpi = self.extraction.cache, self.options.dpi
+        with stage(page_num, "render"):
+            if page_num in self.cached_pages:
+                page_image = load_cached_page_image(cache, self.page_hashes.get(page_num), dpi)
+                if page_image is None:
+                    # Entrée évincée entre-temps : rendu isolé de la page
+                    page_image = extract_page_image_in_memory(self.extraction.pdf_path, page_num, dpi)
+                return page_image
+            _, page_image = next(rendered)
+            if page_image is None:
+                raise RuntimeError(f"rendu de la page impossible ({rasterizer.errors.get(page_num)})")
+            store_page_image(cache, self.page_hashes.get(page_num), dpi, page_image)
+            return page_image
+
+    def process_window(self):
+        options, extraction = self.options, self.extraction
+        cache = extraction.cache
+        # 1. Mise en page : inférence par lot sur les pages de la fenêtre absentes du cache
+        layout_params = layout_stage_params(options.dpi, options.layout_max_side)
+        raw_by_page = {}
+        for page_num, _ in self.window:
+            cached = lookup_stage(cache, "layout", self.page_hashes.get(page_num), layout_params)
+            if cached is not None:
+                raw_by_page[page_num] = cached
+        to_detect = [(p, img) for p, img in self.window if p not in raw_by_page and img is not None]
+        if to_detect:
+            try:
+                t0 = time.perf_counter()
+                with stage(None, "layout", pages=len(to_detect)):
+                    detected = detect_layout_batch(
+                        [as_rgb(img) for _, img in to_detect],
+                        batch_size=options.layout_batch_size, torch_threads=options.layout_torch_threads,
+                        max_side=options.layout_max_side
+                    )
+                share = (time.perf_counter() - t0) / len(to_detect)
+                for (page_num, _), blocks in zip(to_detect, detected):
+                    extraction.page_seconds[page_num] = extraction.page_seconds.get(page_num, 0.0) + share
+                    raw_by_page[page_num] = blocks
+                    store_stage(cache, "layout", self.page_hashes.get(page_num), layout_params, blocks)
+            except Exception as e:
+                # Les pages restantes seront détectées une par une dans analyze_page
+                log(f"[SEGMENT] Détection par lot en échec : {e}")
+        # 2. Analyse page par page
+        for page_num, page_image in self.window:
+            try:
+                self.deferred.append(extraction.timed(
+                    page_num, analyze_page,
+                    self.pdf.pages[page_num], page_num, page_image, extraction.dirs,
+                    dpi=options.dpi, cache=cache, page_hash=self.page_hashes.get(page_num),
+                    raw_blocks=raw_by_page.get(page_num), layout_max_side=options.layout_max_side,
+                    save_png=options.save_page_images, png_compress_level=options.png_compress_level,
+                    artifacts=extraction.artifacts, ocr_mode=options.ocr_mode
+                ))
+            except Exception as e:
+                extraction.fail(page_num, e)
+        self.window.clear()
+        # 3. Fin des pages : lecture camelot groupée dès qu'assez de pages ont un bloc Table
+        self.finish_deferred()
+
+    def finish_deferred(self, final: bool = False):
+        extraction, deferred = self.extraction, self.deferred
+        table_pages = [st["page_num"] for st in deferred if st["has_table"]]
+        if table_pages and (final or len(table_pages) >= self.options.table_chunk_size
+                            or len(deferred) >= self.max_deferred):
+            # camelot en série (table_workers=0) ; sinon seulement la soumission au pool
+            with stage(None, "tables_prefetch", pages=len(table_pages)):
+                self.table_stage.prefetch(table_pages)
+            ready = len(deferred)
         else:
-            start_idx = max(0, start_page - 1)
-            end_idx = end_page if end_page is not None else total_pages
-            end_idx = min(end_idx, total_pages)
-            pages_range = list(range(start_idx, end_idx))
-            if max_pages is not None:
-                pages_range = pages_range[:max_pages]
-        for page_num in tqdm(pages_range, desc="Extraction pages"):
+            # Pages avant la première page à tableau : rien à attendre
+            ready = next((i for i, st in enumerate(deferred) if st["has_table"]), len(deferred))
+        for st in deferred[:ready]:
+            page_num = st["page_num"]
             try:
-                log(f"\n[PAGE {page_num+1}] === Extraction début ===")
-                page = pdf.pages[page_num]
-                img_path = extract_page_image(pdf_path, page_num, images_dir)
-                pil_image = Image.open(img_path).convert("RGB")
-                features = extract_pdfplumber_features(page, images_dir)
-                pdf_words = features["words"]
-                ocr_words = extract_words_ocr(img_path)
-                existing = set((w["text"], tuple(w["bbox"])) for w in pdf_words)
-                for w in ocr_words:
-                    if (w["text"], tuple(w["bbox"])) not in existing:
-                        pdf_words.append(w)
-                features["words"] = pdf_words
-                log(f"[FUSION WORDS] pdfplumber={len(pdf_words)}, ocr-only={len(ocr_words)}")
-
-                # CLUSTERING LIGNES (bottom-up)
-                lines_extracted = cluster_words_to_lines(features["words"], y_thresh=5)
-                features["lines_extracted"] = lines_extracted
-
-                tables = extract_tables(pdf_path, page_num, tables_dir, htmltables_dir)
-                blocks_ia = segment_blocks_layoutparser(img_path)
-                if not blocks_ia:
-                    log("[SEGMENT] Aucun bloc IA détecté, fallback full-page.")
-                    blocks_ia = [{
-                        "type": "Text",
-                        "bbox": [0, 0, pil_image.width, pil_image.height],
-                        "score": 1.0,
-                        "text": "",
-                    }]
-                fused_blocks = fusion_blocks(blocks_ia, features, tables, pil_image, mathml_dir)
-                page_json = build_page_json(
-                    page_num,
-                    features.get("page_width"),
-                    features.get("page_height"),
-                    fused_blocks,
-                    logical_structure=None,
-                    lines_extracted=lines_extracted
-                )
-                json_path = os.path.join(json_dir, f"page_{page_num+1}.json")
-                with open(json_path, "w", encoding="utf8") as f:
-                    json.dump(page_json, f, ensure_ascii=False, indent=2)
-                all_pages_json.append(page_json)
-                log(f"[SAVE] JSON écrit : {json_path}")
+                raw_tables = []
+                if st["has_table"]:
+                    with stage(page_num, "tables"):
+                        raw_tables = extraction.timed(page_num, self.table_stage.get, page_num)
+                extraction.emit(extraction.timed(
+                    page_num, finish_page, st, raw_tables, extraction.dirs,
+                    page_format=self.options.page_format, artifacts=extraction.artifacts
+                ), page_num)
             except Exception as e:
-                log(f"[WARN] Extraction skipped for page {page_num+1}: {e}")
-                continue
-    if export_json_pickle:
-        export_document_json_pickle(all_pages_json, export_dir, base_name=base_export_name)
-    export_lines_to_csv_txt(all_pages_json, export_dir, base_name="lines_extracted")
-    log(f"\nExtraction complète : {json_dir}/page_X.json (et images/tables/formules associés)")
-    log(f"Export global JSON/Pickle : {export_dir}/{base_export_name}.json et .pkl")
-    log(f"Export lignes CSV/TXT : {export_dir}/lines_extracted.csv et .txt")
+                extraction.fail(page_num, e)
+        del deferred[:ready]
 
+def extract_all(pdf_path: str, options: ExtractionOptions = None, **kwargs) -> None:
+    """
+    Extraction de tout (ou partie) du document, en série ou sur un pool de processus (options.workers).
+    Paramètres : 'options' (ExtractionOptions) et/ou ses champs en arguments nommés.
+    """
+    import pdfplumber
+
+    options = replace(options, **kwargs) if options is not None else ExtractionOptions(**kwargs)
+    if options.ocr_mode not in OCR_MODES:
+        raise ValueError(f"ocr_mode inconnu : {options.ocr_mode} (attendu : {', '.join(OCR_MODES)})")
+    extraction = _ExtractionRun(pdf_path, options)
+    with pdfplumber.open(pdf_path) as pdf, recording(extraction.recorder):
+        pages_range = resolve_pages_range(len(pdf.pages), options.max_pages, options.start_page,
+                                          options.end_page, options.pages)
+        pages_todo = extraction.pages_todo(pages_range)
+        if options.workers and options.workers > 1 and len(pages_todo) > 1:
+            extraction.run_pool(pages_todo)
+        else:
+            _SerialDriver(extraction, pdf, pages_todo).run()
+        with stage(None, "artifacts_flush"):
+            extraction.report_write_errors(extraction.artifacts.flush())
+        retried = extraction.retry_failed(pdf, pages_todo)
+    extraction.finish(pages_range, retried)
@@ -1,16 +1,11 @@
 # ia_mode/json2csv.py
 
-import os
-import json
 import csv
-from glob import glob
+from ia_mode.page_format import iter_pages
 
 def json_folder_to_csv(json_dir, out_csv):
     rows = []
-    json_files = sorted(glob(os.path.join(json_dir, "*.json")))
-    for jf in json_files:
-        with open(jf, encoding="utf8") as f:
-            data = json.load(f)
+    for data in iter_pages(json_dir):
         page = data.get("page_num", "???")
         for b in data.get("blocks", []):
             for c in b.get("content", []):
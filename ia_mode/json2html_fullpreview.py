@@ -1,7 +1,6 @@
 import os
-import json
-from glob import glob
 from html import escape
+from ia_mode.page_format import load_page, page_files
 
 def wysiwyg_phrase_overlays(block):
     """Retourne les overlays HTML pour chaque phrase dans block['content']"""
@@ -107,9 +106,8 @@ def page_div(page_num, page_json, images_dir, htmltables_dir, show_text=True, sh
 
 def jsons2html(json_files, out_html_path, images_dir, htmltables_dir, show_text=True, show_images=True, show_tables=True, show_lines=True):
     pages = []
-    for jf in sorted(json_files):
-        with open(jf, encoding="utf8") as f:
-            pages.append(json.load(f))
+    for jf in json_files:
+        pages.append(load_page(jf))
     if not pages:
         print("Aucune page à prévisualiser.")
         return
@@ -180,7 +178,7 @@ if __name__ == "__main__":
     parser.add_argument("--hide-tables", action="store_true", help="Masquer les tableaux extraits")
     parser.add_argument("--hide-lines", action="store_true", help="Masquer les lignes bottom-up")
     args = parser.parse_args()
-    json_files = sorted(glob(os.path.join(args.json_dir, "*.json")))
+    json_files = page_files(args.json_dir)
     if not json_files:
         print("Aucun fichier JSON trouvé.")
     else:
@@ -1,7 +1,6 @@
 import os
-import json
-from glob import glob
 from html import escape
+from ia_mode.page_format import load_page, page_files
 
 LINE_CLUSTER_COLOR = "#1effb4"
 WORD_COLOR_PDF = "#ff2828"
@@ -92,8 +91,7 @@ def html_for_lines(lines):
     return html
 
 def json2html(json_path, out_html_path, page_w=1000, page_h=1415, show_lines=True):
-    with open(json_path, encoding="utf8") as f:
-        data = json.load(f)
+    data = load_page(json_path)
     blocks = data.get("blocks", [])
     lines = data.get("lines_extracted", []) if show_lines else []
     page_w = data.get("width", page_w)
@@ -126,7 +124,7 @@ if __name__ == "__main__":
     parser.add_argument("--out_dir", default=None, help="Dossier HTML (défaut : json_dir/html)")
     parser.add_argument("--hide-lines", action="store_true", help="Ne pas afficher les lignes bottom-up")
     args = parser.parse_args()
-    json_files = sorted(glob(os.path.join(args.json_dir, "*.json")))
+    json_files = page_files(args.json_dir)
     out_dir = args.out_dir or os.path.join(args.json_dir, "html")
     os.makedirs(out_dir, exist_ok=True)
     for jf in json_files:
@@ -1,20 +1,15 @@
 # ia_mode/json_audit.py
 
-import os
-import json
 import argparse
 from collections import Counter, defaultdict
-from glob import glob
+from ia_mode.page_format import iter_pages
 
 def audit_json_folder(json_dir):
-    json_files = sorted(glob(os.path.join(json_dir, "*.json")))
     global_stats = Counter()
     type_stats = defaultdict(Counter)
     warnings = []
 
-    for jf in json_files:
-        with open(jf, encoding="utf8") as f:
-            data = json.load(f)
+    for data in iter_pages(json_dir):
         page = data.get("page_num", "???")
         blocks = data.get("blocks", [])
         global_stats["pages"] += 1
@@ -0,0 +1,171 @@
+# verse/ia_mode/layout.py
+
+from bisect import bisect_left, bisect_right
+from ia_mode.models import get_layout_model
+
+LAYOUT_BATCH_SIZE = 4
+# Grand côté (px) de l'image donnée au modèle ; None = résolution de rendu.
+# PubLayNet a été entraîné sur des pages d'environ 600 x 800 px : un rendu 300 DPI
+# (2480 x 3508 en A4) est de toute façon réduit par le pré-traitement Detectron2.
+LAYOUT_MAX_SIDE = None
+# Écart de fusion verticale des blocs en points PDF (15 px d'un rendu 300 DPI) : même fusion quel que soit le dpi
+MERGE_THRESH_POINTS = 15.0 * 72 / 300
+
+def layout_to_blocks(layout):
+    """
+    Convertit un lp.Layout en liste de blocs {"type", "bbox", "score", "text"}.
+    """
+    blocks = []
+    for l in layout:
+        blocks.append({
+            "type": l.type,
+            "bbox": [l.block.x_1, l.block.y_1, l.block.x_2, l.block.y_2],
+            "score": float(l.score),
+            "text": getattr(l, "text", "")
+        })
+    return blocks
+
+def scale_blocks(blocks, factor_x, factor_y=None):
+    """
+    Copie des blocs avec bbox multipliées par (factor_x, factor_y) : image réduite -> pixels de rendu.
+    """
+    factor_y = factor_x if factor_y is None else factor_y
+    scaled = []
+    for b in blocks:
+        x0, y0, x1, y1 = b["bbox"]
+        scaled.append(dict(b, bbox=[x0 * factor_x, y0 * factor_y, x1 * factor_x, y1 * factor_y]))
+    return scaled
+
+def downscale_image(image, max_side):
+    """
+    Réduit l'image pour que son grand côté vaille au plus 'max_side' pixels.
+    Retourne (image réduite, facteur x, facteur y) où les facteurs ramènent
+    les coordonnées de l'image réduite vers l'image d'origine.
+    """
+    from PIL import Image
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(image)
+    width, height = image.size
+    long_side = max(width, height)
+    if not max_side or long_side <= max_side:
+        return image, 1.0, 1.0
+    ratio = max_side / float(long_side)
+    small = image.resize((max(1, round(width * ratio)), max(1, round(height * ratio))), Image.BILINEAR)
+    return small, width / float(small.size[0]), height / float(small.size[1])
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def merge_vertical_blocks(blocks, thresh=15.0):
+    """
+    Fusionne les fragments d'un même bloc découpé verticalement par le modèle : deux blocs
+    se rejoignent si leurs bords gauches et droits sont à moins de 'thresh' et si le haut
+    de l'un est à moins de 2 x 'thresh' du bas de l'autre. La fusion est transitive
+    (chaînes de 3 fragments ou plus, union-find).
+    Tri des blocs par bas (y1) puis un seul balayage : pour chaque bloc, seuls les blocs dont
+    le bas est dans la fenêtre [y0 - 2 x thresh, y0 + 2 x thresh] sont comparés.
+    Les blocs d'entrée ne sont pas modifiés. Chaque bloc rendu a la bbox englobante de ses
+    fragments, le type et le score du premier, et "merged_from" : indices des blocs d'origine.
+    L'ordre de sortie est celui du premier fragment de chaque groupe.
+    """
+    n = len(blocks)
+    parent = list(range(n))
+    by_bottom = sorted(range(n), key=lambda i: blocks[i]["bbox"][3])
+    bottoms = [blocks[i]["bbox"][3] for i in by_bottom]
+    for j, other in enumerate(blocks):
+        ox0, oy0, ox1, _ = other["bbox"][:4]
+        lo = bisect_right(bottoms, oy0 - 2 * thresh)
+        hi = bisect_left(bottoms, oy0 + 2 * thresh)
+        for i in by_bottom[lo:hi]:
+            if i == j:
+                continue
+            cx0, _, cx1, cy1 = blocks[i]["bbox"][:4]
+            if abs(cx0 - ox0) < thresh and abs(cx1 - ox1) < thresh and 0 < abs(cy1 - oy0):
+                ri, rj = _find(parent, i), _find(parent, j)
+                if ri != rj:
+                    # Racine = plus petit indice : le groupe garde l'attribut du premier fragment
+                    parent[max(ri, rj)] = min(ri, rj)
+    groups = {}
+    for i in range(n):
+        groups.setdefault(_find(parent, i), []).append(i)
+    merged = []
+    for root in sorted(groups):
+        members = groups[root]
+        boxes = [blocks[i]["bbox"] for i in members]
+        merged.append(dict(
+            blocks[root],
+            bbox=[min(b[0] for b in boxes), min(b[1] for b in boxes),
+                  max(b[2] for b in boxes), max(b[3] for b in boxes)],
+            merged_from=members
+        ))
+    return merged
+
+def _predict_batch(model, images):
+    # Reprend le pré-traitement de detectron2 DefaultPredictor.__call__, mais pour un lot d'images
+    import torch
+    predictor = model.model
+    inputs = []
+    for image in images:
+        array = model.image_loader(image)
+        if predictor.input_format == "RGB":
+            array = array[:, :, ::-1]
+        height, width = array.shape[:2]
+        resized = predictor.aug.get_transform(array).apply_image(array)
+        tensor = torch.as_tensor(resized.astype("float32").transpose(2, 0, 1))
+        inputs.append({"image": tensor, "height": height, "width": width})
+    with torch.no_grad():
+        outputs = predictor.model(inputs)
+    return [model.gather_output(o) for o in outputs]
+
+def _supports_batch(model):
+    predictor = getattr(model, "model", None)
+    return all(hasattr(predictor, attr) for attr in ("model", "aug", "input_format")) \
+        and hasattr(model, "gather_output") and hasattr(model, "image_loader")
+
+def detect_layout_batch(images, batch_size=None, torch_threads=None, model=None, max_side=None):
+    """
+    Détection de mise en page sur une liste d'images en mémoire (PIL.Image ou np.ndarray RGB).
+    Les images passent dans le modèle Detectron2 par lots de 'batch_size' ; 'torch_threads'
+    fixe le nombre de threads intra-op de torch pendant l'appel (rétabli ensuite).
+    Avec 'max_side', le modèle reçoit une copie réduite de chaque image (grand côté
+    <= max_side px) et les bbox sont remises à l'échelle de l'image d'origine.
+    Retourne une liste de blocs par image, dans l'ordre des images.
+    Si le modèle ne permet pas l'inférence par lot, repli sur model.detect() image par image.
+    """
+    model = model or get_layout_model()
+    batch_size = max(1, batch_size or LAYOUT_BATCH_SIZE)
+    max_side = max_side or LAYOUT_MAX_SIDE
+    images = list(images)
+    if not images:
+        return []
+    factors = [(1.0, 1.0)] * len(images)
+    if max_side:
+        reduced = [downscale_image(image, max_side) for image in images]
+        images = [r[0] for r in reduced]
+        factors = [(r[1], r[2]) for r in reduced]
+    previous_threads = None
+    if torch_threads:
+        import torch
+        previous_threads = torch.get_num_threads()
+        torch.set_num_threads(torch_threads)
+    try:
+        results = []
+        batched = _supports_batch(model)
+        for i in range(0, len(images), batch_size):
+            batch = images[i:i + batch_size]
+            if batched:
+                layouts = _predict_batch(model, batch)
+            else:
+                layouts = [model.detect(image) for image in batch]
+            results.extend(layout_to_blocks(layout) for layout in layouts)
+        return [
+            scale_blocks(blocks, fx, fy) if (fx, fy) != (1.0, 1.0) else blocks
+            for blocks, (fx, fy) in zip(results, factors)
+        ]
+    finally:
+        if previous_threads is not None:
+            import torch
+            torch.set_num_threads(previous_threads)
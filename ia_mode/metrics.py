@@ -0,0 +1,250 @@
+# verse/ia_mode/metrics.py
+"""
+Mesures par page et par étape de l'extraction : temps réel, temps CPU, RSS, compteurs.
+
+Chaque étape mesurée produit un événement
+    {"event": "stage", "page": 12, "stage": "ocr", "wall": 1.82, "self_wall": 1.82,
+     "cpu": 1.79, "rss_mb": 812.4, "peak_rss_mb": 903.1, "counts": {"words": 412}}
+et chaque page terminée un événement {"event": "page", "page": 12, "wall": ..., "counts": {...}}.
+Les événements sont ajoutés à export/metrics.jsonl et passés au callback éventuel
+(le backend peut les relayer). "self_wall" exclut le temps des étapes imbriquées.
+
+Les étapes sont déclarées dans le code par `with stage(page_num, "ocr"):` ; sans
+enregistreur actif (set_recorder), c'est sans effet.
+
+    python -m ia_mode.metrics output_doc/export/metrics.jsonl --top 10
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+METRICS_NAME = "metrics.jsonl"
+
+def _rss_mb():
+    # RSS courant (Linux : /proc/self/statm), sinon None
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None
+
+def _peak_rss_mb():
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss : Ko sous Linux, octets sous macOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except (ImportError, OSError):
+        return None
+
+class MetricsRecorder:
+    """
+    Enregistreur d'événements de mesure : fichier JSONL (path) et/ou callback(event).
+    Sans path ni callback, les événements sont seulement gardés dans .events
+    (processus workers : renvoyés au processus principal avec la page).
+    """
+
+    def __init__(self, path=None, callback=None, keep_events=False):
+        self.path = path
+        self.callback = callback
+        self.keep_events = keep_events or (path is None and callback is None)
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = open(path, "a", encoding="utf8") if path else None
+
+    def emit(self, event):
+        with self._lock:
+            if self.keep_events:
+                self.events.append(event)
+            if self._file is not None:
+                self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+                self._file.flush()
+        if self.callback is not None:
+            try:
+                self.callback(event)
+            except Exception:
+                # Un callback défaillant ne doit pas interrompre l'extraction
+                pass
+
+    def take_events(self):
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+    @contextmanager
+    def stage(self, page_num, name, **counts):
+        """
+        Mesure une étape. Le dict rendu peut être complété de compteurs pendant l'étape.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        frame = {"counts": dict(counts), "child_wall": 0.0}
+        stack.append(frame)
+        wall0 = time.perf_counter()
+        cpu0 = time.thread_time()
+        try:
+            yield frame["counts"]
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.thread_time() - cpu0
+            stack.pop()
+            if stack:
+                stack[-1]["child_wall"] += wall
+            self.emit({
+                "event": "stage",
+                "page": page_num + 1 if page_num is not None else None,
+                "stage": name,
+                "wall": round(wall, 6),
+                "self_wall": round(wall - frame["child_wall"], 6),
+                "cpu": round(cpu, 6),
+                "rss_mb": _round(_rss_mb()),
+                "peak_rss_mb": _round(_peak_rss_mb()),
+                "counts": frame["counts"],
+            })
+
+    def page_done(self, page_num, wall=None, **counts):
+        self.emit({
+            "event": "page",
+            "page": page_num + 1,
+            "wall": round(wall, 6) if wall is not None else None,
+            "peak_rss_mb": _round(_peak_rss_mb()),
+            "counts": counts,
+        })
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+# Enregistreur actif du processus (None : mesures désactivées)
+_RECORDER = None
+
+def set_recorder(recorder):
+    global _RECORDER
+    _RECORDER = recorder
+
+def get_recorder():
+    return _RECORDER
+
+@contextmanager
+def recording(recorder):
+    """
+    Active 'recorder' le temps du bloc (puis rétablit l'enregistreur précédent).
+    """
+    previous = _RECORDER
+    set_recorder(recorder)
+    try:
+        yield recorder
+    finally:
+        set_recorder(previous)
+
+@contextmanager
+def stage(page_num, name, **counts):
+    """
+    Mesure l'étape 'name' de la page 'page_num' (index 0) sur l'enregistreur actif.
+    Rend un dict de compteurs à compléter (sans effet si aucun enregistreur n'est actif).
+    """
+    recorder = _RECORDER
+    if recorder is None:
+        yield dict(counts)
+        return
+    with recorder.stage(page_num, name, **counts) as c:
+        yield c
+
+def read_events(path):
+    with open(path, "r", encoding="utf8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+def summarize(events, top=10):
+    """
+    Résumé d'une extraction : étapes classées par temps propre total (self_wall),
+    avec CPU, moyenne / p50 / p95 par page, et les 'top' pages les plus lentes.
+    """
+    stages = {}
+    pages = {}
+    peak = None
+    for e in events:
+        if e.get("peak_rss_mb") is not None:
+            peak = max(peak or 0, e["peak_rss_mb"])
+        if e.get("event") == "stage":
+            s = stages.setdefault(e["stage"], {"self": [], "cpu": 0.0, "counts": {}})
+            s["self"].append(e["self_wall"])
+            s["cpu"] += e.get("cpu") or 0.0
+            for k, v in (e.get("counts") or {}).items():
+                if isinstance(v, (int, float)):
+                    s["counts"][k] = s["counts"].get(k, 0) + v
+            if e.get("page") is not None:
+                p = pages.setdefault(e["page"], {"wall": 0.0, "stages": {}})
+                p["stages"][e["stage"]] = round(p["stages"].get(e["stage"], 0.0) + e["self_wall"], 4)
+        elif e.get("event") == "page":
+            p = pages.setdefault(e["page"], {"wall": 0.0, "stages": {}})
+            p["wall"] = e.get("wall") or sum(p["stages"].values())
+            p["counts"] = e.get("counts", {})
+    total = sum(sum(s["self"]) for s in stages.values()) or 1.0
+    ranking = []
+    for name, s in stages.items():
+        values = sorted(s["self"])
+        ranking.append({
+            "stage": name,
+            "total_s": round(sum(values), 3),
+            "share": round(sum(values) / total, 3),
+            "cpu_s": round(s["cpu"], 3),
+            "calls": len(values),
+            "mean_s": round(sum(values) / len(values), 4),
+            "p50_s": round(_percentile(values, 0.5), 4),
+            "p95_s": round(_percentile(values, 0.95), 4),
+            "counts": s["counts"],
+        })
+    ranking.sort(key=lambda r: -r["total_s"])
+    slowest = sorted(pages.items(), key=lambda kv: -(kv[1]["wall"] or sum(kv[1]["stages"].values())))[:top]
+    return {
+        "pages": len(pages),
+        "peak_rss_mb": peak,
+        "stages": ranking,
+        "slowest_pages": [dict(page=num, **info) for num, info in slowest],
+    }
+
+def print_report(summary):
+    print(f"Pages mesurées : {summary['pages']}   RSS max : {summary['peak_rss_mb']} Mo")
+    print(f"\n{'Étape':<14}{'total (s)':>11}{'part':>7}{'CPU (s)':>10}{'appels':>8}{'moy.':>9}{'p95':>9}")
+    for r in summary["stages"]:
+        print(f"{r['stage']:<14}{r['total_s']:>11.2f}{r['share']:>7.0%}{r['cpu_s']:>10.2f}"
+              f"{r['calls']:>8}{r['mean_s']:>9.3f}{r['p95_s']:>9.3f}")
+    print("\nPages les plus lentes :")
+    for p in summary["slowest_pages"]:
+        worst = sorted(p["stages"].items(), key=lambda kv: -kv[1])[:3]
+        detail = ", ".join(f"{k}={v:.2f}s" for k, v in worst)
+        print(f"  page {p['page']:<5} {p['wall'] or 0:.2f}s  ({detail})")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rapport des mesures d'extraction (étapes et pages les plus lentes)")
+    parser.add_argument("path", help="metrics.jsonl, ou dossier export/")
+    parser.add_argument("--top", type=int, default=10, help="Nombre de pages lentes affichées")
+    parser.add_argument("--json", action="store_true", help="Sortie JSON")
+    args = parser.parse_args()
+    path = os.path.join(args.path, METRICS_NAME) if os.path.isdir(args.path) else args.path
+    summary = summarize(read_events(path), top=args.top)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print_report(summary)
@@ -0,0 +1,135 @@
+# verse/ia_mode/models.py
+
+import os
+import threading
+import time
+
+LAYOUT_MODEL_PATH = os.path.join(os.path.dirname(__file__), "models_pth/faster_rcnn_R_50_FPN_3x/model_final.pth")
+CONFIG_PATH = "lp://PubLayNet/faster_rcnn_R_50_FPN_3x/config"
+LAYOUT_LABEL_MAP = {0: "Text", 1: "Title", 2: "List", 3: "Table", 4: "Figure"}
+LAYOUT_SCORE_THRESH = 0.5
+SPACY_MODELS = ("fr_core_news_md", "en_core_web_sm")
+
+# Modèles chargés (cache processus) + un verrou par modèle :
+# charger spaCy ne bloque pas un thread qui attend Detectron2, et inversement.
+_MODELS = {}
+_LOCKS = {name: threading.Lock() for name in ("layout", "ner", "senter", "sentencizer")}
+
+def _load_layout_model():
+    import layoutparser as lp
+    return lp.Detectron2LayoutModel(
+        CONFIG_PATH,
+        LAYOUT_MODEL_PATH,
+        extra_config=["MODEL.ROI_HEADS.SCORE_THRESH_TEST", LAYOUT_SCORE_THRESH],
+        label_map=LAYOUT_LABEL_MAP
+    )
+
+def _load_ner():
+    import spacy
+    last_error = None
+    for name in SPACY_MODELS:
+        try:
+            return spacy.load(name)
+        except Exception as e:
+            last_error = e
+    raise last_error
+
+def _load_senter():
+    # Pipeline réduit au découpage en phrases statistique (composant "senter", désactivé par défaut)
+    import spacy
+    nlp = get_ner()
+    name = f"{nlp.meta['lang']}_{nlp.meta['name']}"
+    keep = ("tok2vec", "senter")
+    exclude = [p for p in nlp.component_names if p not in keep]
+    senter = spacy.load(name, exclude=exclude)
+    if "senter" in senter.disabled:
+        senter.enable_pipe("senter")
+    return senter
+
+def _load_sentencizer():
+    # Découpage par règles (ponctuation), sans modèle statistique
+    import spacy
+    nlp = spacy.blank(get_ner().lang)
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+_LOADERS = {
+    "layout": _load_layout_model,
+    "ner": _load_ner,
+    "senter": _load_senter,
+    "sentencizer": _load_sentencizer,
+}
+
+def _get(name):
+    model = _MODELS.get(name)
+    if model is None:
+        with _LOCKS[name]:
+            # Double vérification : un autre thread a pu charger le modèle entre-temps
+            model = _MODELS.get(name)
+            if model is None:
+                model = _LOADERS[name]()
+                _MODELS[name] = model
+    return model
+
+def get_layout_model():
+    """
+    Modèle LayoutParser (Detectron2, PubLayNet), chargé au premier appel puis partagé.
+    """
+    return _get("layout")
+
+def get_ner():
+    """
+    Pipeline spaCy (fr_core_news_md, à défaut en_core_web_sm), chargé au premier appel puis partagé.
+    """
+    return _get("ner")
+
+def get_sentence_nlp(mode="senter"):
+    """
+    Pipeline léger dédié au découpage en phrases : "senter" ou "sentencizer".
+    """
+    if mode not in ("senter", "sentencizer"):
+        raise ValueError(f"Mode de segmentation inconnu : {mode}")
+    return _get(mode)
+
+def set_layout_model(model):
+    """
+    Injecte un modèle de mise en page déjà construit (préchargement, tests, modèle alternatif).
+    """
+    with _LOCKS["layout"]:
+        _MODELS["layout"] = model
+
+def set_ner(nlp):
+    """
+    Injecte un pipeline spaCy déjà chargé. Les pipelines de phrases dérivés de l'ancien
+    ("senter", "sentencizer") sont oubliés et seront reconstruits depuis le nouveau.
+    """
+    with _LOCKS["ner"]:
+        _MODELS["ner"] = nlp
+    for name in ("senter", "sentencizer"):
+        with _LOCKS[name]:
+            _MODELS.pop(name, None)
+
+def models_loaded():
+    return {name: name in _MODELS for name in _LOADERS}
+
+def unload_models():
+    """
+    Libère les modèles en cache (ils seront rechargés au prochain accès).
+    """
+    for name in _LOADERS:
+        with _LOCKS[name]:
+            _MODELS.pop(name, None)
+
+def warmup_models(layout=True, ner=True):
+    """
+    Précharge les modèles (démarrage des workers FastAPI, workers d'extraction...).
+    Retourne le temps de chargement en secondes de chaque modèle demandé.
+    """
+    timings = {}
+    for name, wanted in (("layout", layout), ("ner", ner)):
+        if not wanted:
+            continue
+        t0 = time.perf_counter()
+        _get(name)
+        timings[name] = time.perf_counter() - t0
+    return timings
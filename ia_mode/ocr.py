@@ -1,7 +1,7 @@
 # verse/ia_mode/ocr.py
 
 from PIL import Image
-import pytesseract
+from ia_mode.ocr_engine import image_to_string, image_to_data
 
 def ocr_block(image, box, lang='eng'):
     """
@@ -10,7 +10,7 @@ def ocr_block(image, box, lang='eng'):
     """
     x1, y1, x2, y2 = box
     cropped = image.crop((x1, y1, x2, y2))
-    text = pytesseract.image_to_string(cropped, lang=lang)
+    text = image_to_string(cropped, lang=lang)
     return text.strip()
 
 def ocr_blocks(image, blocks, lang='eng'):
@@ -28,3 +28,73 @@ def ocr_blocks(image, blocks, lang='eng'):
         results.append(block)
     return results
 
+
+class PageOCR:
+    """
+    Résultat Tesseract pleine page (image_to_data) conservé pour toute la page.
+    Sert à la fois à produire les mots OCR de la page et à répondre aux OCR de blocs
+    par recherche de bbox, sans repasser les mêmes pixels dans Tesseract.
+    """
+
+    def __init__(self, data, lang='eng+fra'):
+        self.data = data
+        self.lang = lang
+        self.words = []
+        for i in range(len(data.get("text", []))):
+            text = str(data["text"][i])
+            if not text.strip():
+                continue
+            left, top = int(data["left"][i]), int(data["top"][i])
+            self.words.append({
+                "text": text,
+                "bbox": [left, top, left + int(data["width"][i]), top + int(data["height"][i])],
+                "conf": float(data["conf"][i]),
+                # (bloc, paragraphe, ligne) Tesseract : sert à reconstruire lignes et paragraphes
+                "line_key": (int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i])),
+            })
+
+    @classmethod
+    def from_image(cls, image, lang='eng+fra'):
+        data = image_to_data(image, lang=lang)
+        return cls(data, lang=lang)
+
+    def words_in_bbox(self, bbox, min_overlap=0.5):
+        """
+        Mots dont au moins 'min_overlap' de la surface est dans la bbox (x0, y0, x1, y1).
+        """
+        bx0, by0, bx1, by1 = bbox
+        found = []
+        for w in self.words:
+            x0, y0, x1, y1 = w["bbox"]
+            iw = min(x1, bx1) - max(x0, bx0)
+            ih = min(y1, by1) - max(y0, by0)
+            if iw <= 0 or ih <= 0:
+                continue
+            area = max(1, (x1 - x0) * (y1 - y0))
+            if iw * ih / area >= min_overlap:
+                found.append(w)
+        return found
+
+    def text_in_bbox(self, bbox, min_overlap=0.5):
+        """
+        Texte de la zone reconstruit comme image_to_string (mots séparés par des espaces,
+        lignes par '\\n', paragraphes par une ligne vide) et confiance moyenne des mots.
+        Retourne ("", 0.0) si aucun mot n'est trouvé.
+        """
+        words = self.words_in_bbox(bbox, min_overlap)
+        if not words:
+            return "", 0.0
+        lines = []
+        last_key = None
+        for w in words:
+            key = w["line_key"]
+            if key != last_key:
+                if last_key is not None and key[:2] != last_key[:2]:
+                    lines.append("")
+                lines.append(w["text"])
+            else:
+                lines[-1] += " " + w["text"]
+            last_key = key
+        confs = [w["conf"] for w in words if w["conf"] >= 0]
+        conf = sum(confs) / len(confs) if confs else 0.0
+        return "\n".join(lines).strip(), conf
@@ -0,0 +1,173 @@
+# verse/ia_mode/ocr_engine.py
+"""
+Moteur Tesseract persistant, partagé par tous les appels OCR (pages, blocs, backend).
+
+- tesserocr (binding de l'API C++ Tesseract) : un PyTessBaseAPI par (thread, langues, psm),
+  initialisé une seule fois (données de langue chargées une fois par thread) ; les images PIL
+  sont passées en mémoire, sans processus ni fichier temporaire ;
+- repli pytesseract (un processus tesseract et des fichiers temporaires par appel) si
+  tesserocr n'est pas installé, ou si OCR_BACKEND="pytesseract".
+
+image_to_data() rend le dictionnaire de pytesseract.image_to_data(output_type=Output.DICT)
+(mêmes clés, mêmes numéros bloc / paragraphe / ligne / mot) ; avec tesserocr, seules les
+lignes de niveau mot (level=5) sont produites, les seules lues par ia_mode.ocr.PageOCR.
+"""
+
+import threading
+from PIL import Image
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+OCR_BACKEND = "auto"   # "auto" (tesserocr si installé), "tesserocr" ou "pytesseract"
+DATA_KEYS = ("level", "page_num", "block_num", "par_num", "line_num", "word_num",
+             "left", "top", "width", "height", "conf", "text")
+
+DEBUG = False
+
+def log(msg):
+    if DEBUG:
+        print(msg)
+
+def backend_name(backend=None) -> str:
+    """
+    Backend effectivement utilisé : "tesserocr" ou "pytesseract".
+    """
+    backend = backend or OCR_BACKEND
+    if backend == "pytesseract" or tesserocr is None:
+        if backend == "tesserocr":
+            raise ImportError("tesserocr n'est pas installé (pip install tesserocr)")
+        return "pytesseract"
+    return "tesserocr"
+
+def _as_image(image) -> Image.Image:
+    if isinstance(image, Image.Image):
+        return image
+    return Image.open(image)
+
+class TesseractEnginePool:
+    """
+    APIs Tesseract initialisées, une par (thread, langues, psm) : une API n'est jamais
+    utilisée par deux threads à la fois, et chaque thread garde les siennes d'un appel à l'autre.
+    """
+
+    def __init__(self, tessdata_path=None):
+        self.tessdata_path = tessdata_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._apis = []
+
+    def api(self, lang="eng", psm=None):
+        apis = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        key = (lang, psm)
+        if key not in apis:
+            kwargs = {"lang": lang}
+            if psm is not None:
+                kwargs["psm"] = psm
+            if self.tessdata_path:
+                kwargs["path"] = self.tessdata_path
+            log(f"[OCR] Initialisation Tesseract lang={lang} psm={psm} ({threading.current_thread().name})")
+            apis[key] = tesserocr.PyTessBaseAPI(**kwargs)
+            with self._lock:
+                self._apis.append(apis[key])
+        return apis[key]
+
+    def image_to_string(self, image, lang="eng", psm=None) -> str:
+        api = self.api(lang, psm)
+        api.SetImage(_as_image(image))
+        return api.GetUTF8Text()
+
+    def image_to_data(self, image, lang="eng", psm=None) -> dict:
+        api = self.api(lang, psm)
+        api.SetImage(_as_image(image))
+        api.Recognize()
+        data = {k: [] for k in DATA_KEYS}
+        iterator = api.GetIterator()
+        if iterator is None:
+            return data
+        RIL = tesserocr.RIL
+        block = par = line = word = 0
+        for item in tesserocr.iterate_level(iterator, RIL.WORD):
+            # Numérotation de pytesseract : bloc, paragraphe dans le bloc, ligne dans le paragraphe...
+            if item.IsAtBeginningOf(RIL.BLOCK):
+                block, par, line = block + 1, 0, 0
+            if item.IsAtBeginningOf(RIL.PARA):
+                par, line = par + 1, 0
+            if item.IsAtBeginningOf(RIL.TEXTLINE):
+                line, word = line + 1, 0
+            word += 1
+            text = item.GetUTF8Text(RIL.WORD)
+            box = item.BoundingBox(RIL.WORD)
+            if text is None or box is None:
+                continue
+            x0, y0, x1, y1 = box
+            row = (5, 1, block, par, line, word, x0, y0, x1 - x0, y1 - y0, item.Confidence(RIL.WORD), text)
+            for k, v in zip(DATA_KEYS, row):
+                data[k].append(v)
+        return data
+
+    def close(self):
+        with self._lock:
+            apis, self._apis = self._apis, []
+        for api in apis:
+            api.End()
+        self._local = threading.local()
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def get_engine_pool() -> TesseractEnginePool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = TesseractEnginePool()
+        return _POOL
+
+def _config(psm):
+    return f"--psm {psm}" if psm is not None else ""
+
+def image_to_string(image, lang="eng", psm=None) -> str:
+    """
+    Texte de l'image ('image' : image PIL ou chemin ; 'psm' : mode de segmentation Tesseract).
+    """
+    if backend_name() == "tesserocr":
+        return get_engine_pool().image_to_string(image, lang=lang, psm=psm)
+    return pytesseract.image_to_string(image, lang=lang, config=_config(psm))
+
+def image_to_data(image, lang="eng", psm=None) -> dict:
+    """
+    Mots de l'image avec bbox et confiance, au format pytesseract Output.DICT.
+    """
+    if backend_name() == "tesserocr":
+        return get_engine_pool().image_to_data(image, lang=lang, psm=psm)
+    return pytesseract.image_to_data(image, lang=lang, config=_config(psm), output_type=pytesseract.Output.DICT)
+
+def tesseract_version() -> str:
+    """
+    Backend et version de Tesseract (clé des étapes OCR du cache de pages).
+    """
+    if backend_name() == "tesserocr":
+        return "tesserocr:" + tesserocr.tesseract_version().split()[1]
+    return "pytesseract:" + str(pytesseract.get_tesseract_version())
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+    parser = argparse.ArgumentParser(description="OCR d'images par le moteur Tesseract persistant")
+    parser.add_argument("images", nargs="+", help="Images à lire")
+    parser.add_argument("--lang", default="eng+fra", help="Langues Tesseract")
+    parser.add_argument("--psm", type=int, default=None, help="Mode de segmentation Tesseract")
+    parser.add_argument("--backend", default=OCR_BACKEND, choices=("auto", "tesserocr", "pytesseract"))
+    args = parser.parse_args()
+    OCR_BACKEND = args.backend
+    for path in args.images:
+        t0 = time.perf_counter()
+        text = image_to_string(path, lang=args.lang, psm=args.psm)
+        print(json.dumps({"image": path, "backend": backend_name(), "seconds": round(time.perf_counter() - t0, 4),
+                          "chars": len(text.strip())}, ensure_ascii=False))
@@ -1,7 +1,7 @@
 import os
-import json
 from PIL import Image
 from html import escape
+from ia_mode.page_format import load_page
 
 BLOCK_COLORS = {
     "Text": "#85ea7e80",      # vert semi-transparent
@@ -31,16 +31,19 @@ def css_style_from_block(block):
         css.append(f"text-align:{block['alignment']}")
     return "; ".join(css)
 
-def html_for_block(block, highlight_nontrans=False, highlight_types=None, show_score=False):
+def html_for_block(block, highlight_nontrans=False, highlight_types=None, show_score=False,
+                   scale_x=1.0, scale_y=1.0):
+    # bbox en points PDF (origine en haut à gauche) -> pixels de l'image de fond
     style = css_style_from_block(block)
-    bbox = block.get("bbox", [0,0,100,30])
+    x0, y0, x1, y1 = block.get("bbox", [0,0,100,30])
+    bbox = [round(x0 * scale_x, 2), round(y0 * scale_y, 2), round(x1 * scale_x, 2), round(y1 * scale_y, 2)]
     btype = block.get("type", "Unknown")
     color = BLOCK_COLORS.get(btype, "#99999950")
     if highlight_types and btype not in highlight_types:
         return ""  # filtrage de types
     pos = (
         f"position:absolute; left:{bbox[0]}px; top:{bbox[1]}px; "
-        f"width:{bbox[2]-bbox[0]}px; height:{bbox[3]-bbox[1]}px; "
+        f"width:{round(bbox[2]-bbox[0], 2)}px; height:{round(bbox[3]-bbox[1], 2)}px; "
         f"background:{color}; border:1.5px solid #3336; box-sizing:border-box; overflow:hidden; {style}"
     )
     extra = []
@@ -61,12 +64,15 @@ def html_for_block(block, highlight_nontrans=False, highlight_types=None, show_s
     return html
 
 def overlay_html(image_path, json_path, out_html, highlight_types=None, highlight_nontrans=False, show_score=False):
-    with open(json_path, encoding="utf8") as f:
-        data = json.load(f)
+    data = load_page(json_path)
     blocks = data.get("blocks", [])
     # image : taille réelle
     image = Image.open(image_path)
     w, h = image.size
+    # Même échelle que tools/overlay_blocks.py : taille de l'image / taille de la page en points
+    page_w, page_h = data.get("width"), data.get("height")
+    scale_x = w / page_w if page_w else 1.0
+    scale_y = h / page_h if page_h else 1.0
     # HTML
     html = f"""<!DOCTYPE html>
 <html>
@@ -95,7 +101,9 @@ body {{ background:#f6f6f6; }}
             block,
             highlight_nontrans=highlight_nontrans,
             highlight_types=highlight_types,
-            show_score=show_score
+            show_score=show_score,
+            scale_x=scale_x,
+            scale_y=scale_y
         )
     html += "</div></body></html>"
 
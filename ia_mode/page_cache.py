@@ -0,0 +1,284 @@
+# verse/ia_mode/page_cache.py
+"""
+Cache disque adressé par contenu pour les étapes coûteuses de l'extraction par page.
+
+Clé d'une entrée = hash du contenu de la page PDF + nom de l'étape + version de l'étape
++ paramètres (DPI, langue OCR, configuration du modèle...). Une page inchangée réextraite
+avec les mêmes paramètres ne repasse ni par le rendu, ni par Tesseract, ni par Detectron2,
+ni par camelot ; changer un paramètre ou une version ne recalcule que l'étape concernée.
+
+Les entrées sont des fichiers <racine>/<2 premiers car.>/<clé>.<étape>.<png|json>,
+écrits de façon atomique (fichier temporaire + rename) : plusieurs processus peuvent
+partager le même cache. La taille est bornée en LRU (date de dernier accès = mtime).
+
+    python -m ia_mode.page_cache stats --root ~/.cache/verse/pages
+    python -m ia_mode.page_cache prune --root ~/.cache/verse/pages --max_mb 1024
+"""
+
+import os
+import io
+import json
+import hashlib
+import tempfile
+
+DEFAULT_CACHE_DIR = os.environ.get("VERSE_PAGE_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "verse", "pages"))
+DEFAULT_MAX_MB = 2048
+
+# À incrémenter quand le calcul d'une étape change (invalide uniquement cette étape)
+STAGE_VERSIONS = {
+    "image": 1,
+    "ocr": 1,
+    "layout": 1,
+    "tables": 1,
+    "signals": 1,
+}
+
+# Nombre d'écritures entre deux vérifications de la taille totale du cache
+PRUNE_EVERY = 64
+
+# Clés de dictionnaires PDF qui remontent vers le reste du document : ignorées dans le hash de page
+_SKIP_PDF_KEYS = {"Parent", "P", "Dest", "StructParents", "PieceInfo", "LastModified"}
+
+def _hash_pdf_object(obj, h, seen, depth=0):
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+    from pdfminer.psparser import PSLiteral
+    if depth > 32:
+        return
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in seen:
+            h.update(b"<ref>")
+            return
+        seen.add(obj.objid)
+        obj = obj.resolve()
+    if isinstance(obj, PDFStream):
+        _hash_pdf_object(obj.attrs, h, seen, depth + 1)
+        h.update(obj.get_rawdata() or b"")
+    elif isinstance(obj, dict):
+        for k in sorted(obj, key=str):
+            if str(k) in _SKIP_PDF_KEYS:
+                continue
+            h.update(str(k).encode("utf8"))
+            _hash_pdf_object(obj[k], h, seen, depth + 1)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for v in obj:
+            _hash_pdf_object(v, h, seen, depth + 1)
+        h.update(b"]")
+    elif isinstance(obj, PSLiteral):
+        h.update(str(obj.name).encode("utf8"))
+    elif isinstance(obj, bytes):
+        h.update(obj)
+    else:
+        h.update(repr(obj).encode("utf8"))
+
+def page_content_hash(page):
+    """
+    Hash SHA-256 du contenu d'une page pdfplumber : flux de contenu, ressources
+    (polices, images, XObjects), MediaBox/CropBox et rotation.
+    Si le PDF ne peut pas être parcouru, repli sur (fichier, taille, date, numéro de page).
+    """
+    h = hashlib.sha256()
+    try:
+        page_obj = page.page_obj
+        _hash_pdf_object(page_obj.attrs, h, set())
+        h.update(repr((page_obj.mediabox, page_obj.cropbox, page_obj.rotate)).encode("utf8"))
+    except Exception:
+        path = getattr(getattr(page, "pdf", None), "stream", None)
+        path = getattr(path, "name", "")
+        stat = os.stat(path) if path and os.path.exists(path) else None
+        h.update(repr((path, stat.st_size if stat else None, stat.st_mtime if stat else None,
+                       getattr(page, "page_number", None))).encode("utf8"))
+    return h.hexdigest()
+
+class PageCache:
+    """
+    Cache disque des étapes par page (image rendue, OCR, blocs de mise en page, tableaux).
+    """
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.root = os.path.abspath(root or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, page_hash, stage, params=None):
+        payload = json.dumps({
+            "page": page_hash,
+            "stage": stage,
+            "version": STAGE_VERSIONS.get(stage, 0),
+            "params": params or {},
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+    def _path(self, key, stage, ext):
+        return os.path.join(self.root, key[:2], f"{key}.{stage}.{ext}")
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._writes += 1
+        if self.max_bytes and self._writes % PRUNE_EVERY == 0:
+            self.prune()
+
+    def has(self, key, stage, ext="json"):
+        return os.path.exists(self._path(key, stage, ext))
+
+    def get_json(self, key, stage):
+        path = self._path(key, stage, "json")
+        try:
+            with open(path, "r", encoding="utf8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        return value
+
+    def put_json(self, key, stage, value):
+        self._write_atomic(self._path(key, stage, "json"), json.dumps(value, ensure_ascii=False).encode("utf8"))
+
+    def get_image(self, key, stage="image"):
+        from PIL import Image
+        path = self._path(key, stage, "png")
+        try:
+            image = Image.open(path)
+            image.load()
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        return image
+
+    def put_image(self, key, image, stage="image"):
+        buf = io.BytesIO()
+        image.save(buf, format="PNG", compress_level=1)
+        self._write_atomic(self._path(key, stage, "png"), buf.getvalue())
+
+    def entries(self):
+        """
+        Liste des entrées : (chemin, étape, taille, mtime).
+        """
+        result = []
+        for sub in os.listdir(self.root):
+            subdir = os.path.join(self.root, sub)
+            if not os.path.isdir(subdir):
+                continue
+            for name in os.listdir(subdir):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(subdir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                parts = name.split(".")
+                stage = parts[1] if len(parts) >= 3 else "?"
+                result.append((path, stage, st.st_size, st.st_mtime))
+        return result
+
+    def stats(self):
+        by_stage = {}
+        total = 0
+        for _, stage, size, _ in self.entries():
+            s = by_stage.setdefault(stage, {"entries": 0, "bytes": 0})
+            s["entries"] += 1
+            s["bytes"] += size
+            total += size
+        return {
+            "root": self.root,
+            "entries": sum(s["entries"] for s in by_stage.values()),
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "stages": by_stage,
+        }
+
+    def prune(self, max_bytes=None):
+        """
+        Supprime les entrées les moins récemment utilisées jusqu'à repasser sous 'max_bytes'.
+        Retourne (nombre d'entrées supprimées, octets libérés).
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries(), key=lambda e: e[3])
+        total = sum(e[2] for e in entries)
+        removed = 0
+        freed = 0
+        for path, _, size, _ in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            freed += size
+            removed += 1
+        return removed, freed
+
+    def clear(self):
+        return self.prune(max_bytes=0)
+
+def lookup_stage(cache, stage, page_hash, params):
+    """
+    Valeur JSON d'une étape dans le cache, ou None (absente, ou pas de cache).
+    """
+    if cache is None or page_hash is None:
+        return None
+    return cache.get_json(cache.key(page_hash, stage, params), stage)
+
+def store_stage(cache, stage, page_hash, params, value):
+    if cache is None or page_hash is None:
+        return
+    try:
+        cache.put_json(cache.key(page_hash, stage, params), stage, value)
+    except Exception:
+        # Un cache plein ou en lecture seule ne doit pas faire échouer l'extraction
+        pass
+
+def cached_stage(cache, stage, page_hash, params, compute, encode=None, decode=None):
+    """
+    Résultat d'une étape JSON-sérialisable : lu dans le cache s'il existe, sinon calculé puis stocké.
+    'encode' / 'decode' convertissent la valeur vers / depuis sa forme JSON.
+    Sans cache (cache=None), appelle simplement compute().
+    """
+    stored = lookup_stage(cache, stage, page_hash, params)
+    if stored is not None:
+        return decode(stored) if decode else stored
+    value = compute()
+    store_stage(cache, stage, page_hash, params, encode(value) if encode else value)
+    return value
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspection / purge du cache de pages de l'extraction")
+    parser.add_argument("command", choices=["stats", "prune", "clear"], help="Action à effectuer")
+    parser.add_argument("--root", default=DEFAULT_CACHE_DIR, help="Dossier du cache")
+    parser.add_argument("--max_mb", type=float, default=DEFAULT_MAX_MB, help="Taille maximale (Mo) pour 'prune'")
+    args = parser.parse_args()
+
+    cache = PageCache(args.root, max_bytes=int(args.max_mb * 1024 * 1024))
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    elif args.command == "prune":
+        removed, freed = cache.prune()
+        print(f"{removed} entrées supprimées ({freed / 1024 / 1024:.1f} Mo libérés)")
+    else:
+        removed, freed = cache.clear()
+        print(f"Cache vidé : {removed} entrées ({freed / 1024 / 1024:.1f} Mo)")
@@ -0,0 +1,116 @@
+# verse/ia_mode/page_classifier.py
+"""
+OCR sélectif : chaque page est classée d'après sa couche texte pdfplumber, avant tout OCR.
+
+    text     couche texte fiable, peu d'images : pas d'OCR pleine page
+    scanned  pas (ou presque pas) de texte exploitable : OCR pleine page, mots PDF
+             ignorés si la couche texte est illisible (glyphes "(cid:N)", U+FFFD)
+    hybrid   couche texte fiable et images notables (figures, captures pouvant contenir
+             du texte) : OCR pleine page fusionné aux mots PDF (merge_words)
+
+Signaux : nombre de mots, part de caractères illisibles, couverture de la page par les
+boîtes des caractères, part de la page couverte par des images (union des boîtes).
+Le mode "always" reproduit l'ancien comportement (OCR sur toutes les pages), "never"
+n'utilise que la couche texte.
+"""
+
+import numpy as np
+
+OCR_MODES = ("auto", "always", "never")
+PAGE_TEXT, PAGE_SCANNED, PAGE_HYBRID = "text", "scanned", "hybrid"
+
+# Seuils de classement
+MIN_WORDS = 5                 # en dessous : pas de couche texte exploitable
+MAX_BAD_CHARS = 0.10          # part de caractères illisibles au-delà de laquelle la couche est ignorée
+SCAN_IMAGE_RATIO = 0.50       # image couvrant la majorité de la page...
+SCAN_MAX_COVERAGE = 0.02      # ...avec très peu de texte (numéro de page, filigrane) : page scannée
+HYBRID_IMAGE_RATIO = 0.10     # images notables à côté d'un texte fiable
+_GRID = 64                    # résolution de la grille pour l'union des boîtes d'images
+
+def _is_bad_char(text):
+    return text.startswith("(cid:") or "�" in text
+
+def _union_ratio(boxes, width, height):
+    # Part de la page couverte par l'union des boîtes (grille _GRID x _GRID)
+    if not boxes or not width or not height:
+        return 0.0
+    mask = np.zeros((_GRID, _GRID), dtype=bool)
+    for x0, top, x1, bottom in boxes:
+        c0, c1 = int(max(0, x0) / width * _GRID), int(np.ceil(min(width, x1) / width * _GRID))
+        r0, r1 = int(max(0, top) / height * _GRID), int(np.ceil(min(height, bottom) / height * _GRID))
+        if c1 > c0 and r1 > r0:
+            mask[r0:r1, c0:c1] = True
+    return float(mask.mean())
+
+def page_signals(page, n_words=None):
+    """
+    Signaux de classement d'une page pdfplumber ('n_words' : mots déjà extraits, sinon comptés).
+    """
+    width, height = float(page.width or 0), float(page.height or 0)
+    area = width * height or 1.0
+    chars = page.chars
+    n_bad = sum(1 for c in chars if _is_bad_char(c.get("text", "")))
+    char_area = sum(max(0.0, c["x1"] - c["x0"]) * max(0.0, c["bottom"] - c["top"]) for c in chars)
+    images = [(i["x0"], i["top"], i["x1"], i["bottom"]) for i in page.images]
+    if n_words is None:
+        n_words = len(page.extract_words())
+    return {
+        "words": n_words,
+        "chars": len(chars),
+        "bad_char_ratio": round(n_bad / len(chars), 4) if chars else 0.0,
+        "text_coverage": round(min(1.0, char_area / area), 4),
+        "image_ratio": round(_union_ratio(images, width, height), 4),
+    }
+
+def classify_page(signals):
+    """
+    (type de page, raison) d'après page_signals().
+    """
+    if signals["bad_char_ratio"] > MAX_BAD_CHARS:
+        return PAGE_SCANNED, "text_layer_unreadable"
+    if signals["words"] < MIN_WORDS:
+        return PAGE_SCANNED, "no_text_layer"
+    if signals["image_ratio"] >= SCAN_IMAGE_RATIO and signals["text_coverage"] < SCAN_MAX_COVERAGE:
+        return PAGE_SCANNED, "image_page_sparse_text"
+    if signals["image_ratio"] >= HYBRID_IMAGE_RATIO:
+        return PAGE_HYBRID, "text_and_images"
+    return PAGE_TEXT, "text_layer"
+
+def ocr_decision(page, n_words=None, mode="auto", signals=None):
+    """
+    Décision d'OCR d'une page, telle qu'enregistrée dans le JSON de page ("ocr") :
+    {"mode", "page_kind", "reason", "run_ocr", "use_text_layer", "signals"}.
+    'signals' : signaux déjà calculés par page_signals() (la page n'est alors pas relue).
+    """
+    if mode not in OCR_MODES:
+        raise ValueError(f"ocr_mode inconnu : {mode} (attendu : {', '.join(OCR_MODES)})")
+    if signals is None:
+        signals = page_signals(page, n_words=n_words)
+    kind, reason = classify_page(signals)
+    if mode == "always":
+        run_ocr = True
+    elif mode == "never":
+        run_ocr = False
+    else:
+        run_ocr = kind != PAGE_TEXT
+    return {
+        "mode": mode,
+        "page_kind": kind,
+        "reason": reason,
+        "run_ocr": run_ocr,
+        # Couche texte illisible : ses mots parasiteraient ceux de l'OCR
+        "use_text_layer": not (run_ocr and reason == "text_layer_unreadable"),
+        "signals": signals,
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import pdfplumber
+    parser = argparse.ArgumentParser(description="Classement des pages d'un PDF pour l'OCR sélectif")
+    parser.add_argument("pdf", help="Fichier PDF")
+    parser.add_argument("--mode", default="auto", choices=OCR_MODES, help="Mode d'OCR")
+    args = parser.parse_args()
+    with pdfplumber.open(args.pdf) as pdf:
+        for num, page in enumerate(pdf.pages, 1):
+            print(json.dumps(dict(page=num, **ocr_decision(page, mode=args.mode)), ensure_ascii=False))
@@ -0,0 +1,231 @@
+# verse/ia_mode/page_format.py
+"""
+Format compact des pages extraites (.vpk, msgpack) et lecture commune JSON / NDJSON / compact.
+
+Une page compacte contient les mêmes données que le JSON de page, avec deux différences :
+- les listes de mots ("words") sont stockées en colonnes : texte concaténé + fins de mots
+  (uint32), bbox en un tableau float32 (N x 4), une liste par autre attribut ;
+- les dicts "style" sont remplacés par un numéro dans une table de styles du document.
+
+Un fichier .vpk est une suite d'enregistrements msgpack : {"styles": [...]} ajoute des
+styles à la table, {"page": {...}} est une page. Un document entier (export/<base>.vpk)
+et une page seule (json/page_N.vpk) ont donc le même format.
+
+Les outils lisent les pages par iter_pages() / load_page(), qui rendent les dicts
+habituels quel que soit le format (dossier json/, .json, .ndjson ou .vpk).
+Les dicts de style décodés sont partagés entre les mots qui les utilisent.
+"""
+
+import os
+import re
+import json
+from array import array
+import numpy as np
+
+COMPACT_EXT = ".vpk"
+FORMAT_VERSION = 1
+_WORD_FIELDS = ("text", "bbox")
+
+class StyleTable:
+    """
+    Table des styles d'un document : chaque style distinct reçoit un numéro.
+    """
+
+    def __init__(self):
+        self.items = []
+        self._ids = {}
+        self._flushed = 0
+
+    def intern(self, style):
+        key = json.dumps(style, sort_keys=True, default=str)
+        style_id = self._ids.get(key)
+        if style_id is None:
+            style_id = len(self.items)
+            self._ids[key] = style_id
+            self.items.append(style)
+        return style_id
+
+    def take_new(self):
+        """
+        Styles ajoutés depuis le dernier appel (à écrire avant la page qui les utilise).
+        """
+        new = self.items[self._flushed:]
+        self._flushed = len(self.items)
+        return new
+
+def _is_word_list(value):
+    return (isinstance(value, list) and value and
+            all(isinstance(w, dict) and "text" in w and len(w.get("bbox") or ()) == 4 for w in value))
+
+def encode_words(words, styles):
+    ends = array("I")
+    pos = 0
+    texts = []
+    for w in words:
+        text = str(w["text"])
+        texts.append(text)
+        pos += len(text)
+        ends.append(pos)
+    columns = {}
+    for i, w in enumerate(words):
+        for key, value in w.items():
+            if key in _WORD_FIELDS:
+                continue
+            column = columns.setdefault(key, [None] * len(words))
+            column[i] = styles.intern(value) if key == "style" and isinstance(value, dict) else value
+    return {
+        "n": len(words),
+        "text": "".join(texts),
+        "ends": ends.tobytes(),
+        "bbox": np.asarray([w["bbox"] for w in words], dtype="<f4").tobytes(),
+        "cols": columns,
+    }
+
+def decode_words(packed, styles):
+    n = packed["n"]
+    text = packed["text"]
+    ends = array("I")
+    ends.frombytes(packed["ends"])
+    bboxes = np.frombuffer(packed["bbox"], dtype="<f4").reshape(n, 4).tolist()
+    columns = packed.get("cols", {})
+    words = []
+    start = 0
+    for i in range(n):
+        word = {"text": text[start:ends[i]], "bbox": bboxes[i]}
+        start = ends[i]
+        for key, column in columns.items():
+            value = column[i]
+            if value is None:
+                continue
+            word[key] = styles[value] if key == "style" and isinstance(value, int) else value
+        words.append(word)
+    return words
+
+def encode_page(obj, styles):
+    """
+    Forme compacte d'une page (ou d'une partie de page) : styles numérotés, mots en colonnes.
+    """
+    if isinstance(obj, dict):
+        out = {}
+        for key, value in obj.items():
+            if key == "style" and isinstance(value, dict):
+                out["style@"] = styles.intern(value)
+            elif key == "words" and _is_word_list(value):
+                out["words@"] = encode_words(value, styles)
+            else:
+                out[key] = encode_page(value, styles)
+        return out
+    if isinstance(obj, (list, tuple)):
+        return [encode_page(v, styles) for v in obj]
+    return obj
+
+def decode_page(obj, styles):
+    if isinstance(obj, dict):
+        out = {}
+        for key, value in obj.items():
+            if key == "style@":
+                out["style"] = styles[value]
+            elif key == "words@":
+                out["words"] = decode_words(value, styles)
+            else:
+                out[key] = decode_page(value, styles)
+        return out
+    if isinstance(obj, list):
+        return [decode_page(v, styles) for v in obj]
+    return obj
+
+class CompactWriter:
+    """
+    Écrit des pages au format compact dans un fichier .vpk, une par une (flush après chaque page).
+    """
+
+    def __init__(self, path):
+        import msgpack
+        self.path = path
+        self.styles = StyleTable()
+        self._packer = msgpack.Packer(use_bin_type=True)
+        self._file = open(path, "wb")
+        self._file.write(self._packer.pack({"format": "verse-pages", "version": FORMAT_VERSION}))
+
+    def write(self, page_json):
+        compact = encode_page(page_json, self.styles)
+        new_styles = self.styles.take_new()
+        if new_styles:
+            self._file.write(self._packer.pack({"styles": new_styles}))
+        self._file.write(self._packer.pack({"page": compact}))
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def write_compact_page(page_json, path):
+    """
+    Écrit une page seule (json/page_N.vpk) avec sa propre table de styles.
+    """
+    tmp = path + ".tmp"
+    with CompactWriter(tmp) as writer:
+        writer.write(page_json)
+    os.replace(tmp, path)
+
+def iter_compact(path):
+    import msgpack
+    styles = []
+    with open(path, "rb") as f:
+        for record in msgpack.Unpacker(f, raw=False, strict_map_key=False):
+            if "styles" in record:
+                styles.extend(record["styles"])
+            elif "page" in record:
+                yield decode_page(record["page"], styles)
+
+def _page_number(path):
+    match = re.search(r"(\d+)(?=\.[^.]+$)", os.path.basename(path))
+    return int(match.group(1)) if match else -1
+
+def page_files(directory):
+    """
+    Fichiers de pages d'un dossier json/, triés par numéro de page (page_2 avant page_10).
+    Les .vpk sont pris s'il y en a, sinon les .json.
+    """
+    names = os.listdir(directory)
+    for ext in (COMPACT_EXT, ".json"):
+        files = [os.path.join(directory, n) for n in names if n.endswith(ext)]
+        if files:
+            return sorted(files, key=lambda p: (_page_number(p), p))
+    return []
+
+def load_page(path):
+    """
+    Une page (dict) depuis un fichier page_N.json ou page_N.vpk.
+    """
+    if path.endswith(COMPACT_EXT):
+        return next(iter_compact(path))
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+def iter_pages(source):
+    """
+    Pages (dicts) d'une source : dossier de pages, export .vpk ou .ndjson,
+    page .json seule ou export global .json ({"pages": [...]}).
+    """
+    if os.path.isdir(source):
+        for path in page_files(source):
+            yield from (iter_compact(path) if path.endswith(COMPACT_EXT) else [load_page(path)])
+    elif source.endswith(COMPACT_EXT):
+        yield from iter_compact(source)
+    elif source.endswith(".ndjson"):
+        from ia_mode.page_stream import PageStreamReader
+        yield from PageStreamReader(source)
+    else:
+        data = load_page(source)
+        if isinstance(data, dict) and "pages" in data and "blocks" not in data:
+            yield from data["pages"]
+        else:
+            yield data
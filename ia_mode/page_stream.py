@@ -0,0 +1,142 @@
+# verse/ia_mode/page_stream.py
+"""
+Export document en flux : une page JSON par ligne (NDJSON), écrite dès que la page est
+terminée, et un index binaire compact des positions de chaque page dans le fichier.
+
+    <base>.ndjson      une ligne JSON par page, dans l'ordre d'écriture
+    <base>.ndjson.idx  en-tête INDEX_MAGIC puis une entrée de 16 octets par page :
+                       numéro de page (uint32), position (uint64), longueur (uint32), little-endian
+
+Un arrêt brutal ne perd que la page en cours : le lecteur ignore une entrée d'index ou
+une ligne incomplète. PageStreamReader parcourt ou relit une page sans charger le document.
+"""
+
+import os
+import json
+import struct
+
+INDEX_MAGIC = b"VRSIDX01"
+INDEX_ENTRY = struct.Struct("<IQI")
+
+def index_path_for(path):
+    return path + ".idx"
+
+class PageStreamWriter:
+    """
+    Écrit les pages une par une dans <path> (NDJSON) et leur position dans l'index.
+    Chaque page est vidée sur disque (flush) dès son écriture.
+    """
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.index_path = index_path_for(path)
+        self.fsync = fsync
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._data = open(path, "wb")
+        self._index = open(self.index_path, "wb")
+        self._index.write(INDEX_MAGIC)
+        self._offset = 0
+        self.count = 0
+
+    def write(self, page_json):
+        line = json.dumps(page_json, ensure_ascii=False, separators=(",", ":")).encode("utf8") + b"\n"
+        self._data.write(line)
+        self._data.flush()
+        # L'index n'est écrit qu'une fois la ligne sur disque : il ne pointe jamais vers une page absente
+        self._index.write(INDEX_ENTRY.pack(int(page_json.get("page_num", 0)), self._offset, len(line)))
+        self._index.flush()
+        if self.fsync:
+            os.fsync(self._data.fileno())
+            os.fsync(self._index.fileno())
+        self._offset += len(line)
+        self.count += 1
+
+    def close(self):
+        for f in (self._data, self._index):
+            if not f.closed:
+                f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def _read_index(path, data_size):
+    entries = []
+    index_path = index_path_for(path)
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, "rb") as f:
+        if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            return None
+        raw = f.read()
+    for i in range(len(raw) // INDEX_ENTRY.size):
+        page_num, offset, length = INDEX_ENTRY.unpack_from(raw, i * INDEX_ENTRY.size)
+        if offset + length > data_size:
+            break
+        entries.append((page_num, offset, length))
+    return entries
+
+def _scan_index(path):
+    # Index absent ou illisible : reconstruit en parcourant les lignes (sans les décoder en entier)
+    entries = []
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                page_num = int(json.loads(line).get("page_num", 0))
+            except ValueError:
+                break
+            entries.append((page_num, offset, len(line)))
+            offset += len(line)
+    return entries
+
+class PageStreamReader:
+    """
+    Lecture paresseuse d'un export NDJSON : itération page par page, ou accès direct
+    à une page par son numéro (1-based, comme "page_num" dans le JSON).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        entries = _read_index(path, os.path.getsize(path))
+        self.entries = entries if entries is not None else _scan_index(path)
+        self._by_page = {page_num: (offset, length) for page_num, offset, length in self.entries}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def page_nums(self):
+        return [e[0] for e in self.entries]
+
+    def _read(self, f, offset, length):
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            for _, offset, length in self.entries:
+                yield self._read(f, offset, length)
+
+    def page(self, page_num):
+        if page_num not in self._by_page:
+            raise KeyError(page_num)
+        offset, length = self._by_page[page_num]
+        with open(self.path, "rb") as f:
+            return self._read(f, offset, length)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Lecture d'un export NDJSON de pages")
+    parser.add_argument("path", help="Fichier .ndjson")
+    parser.add_argument("--page", type=int, default=None, help="Affiche cette page (numéro 1-based)")
+    args = parser.parse_args()
+    reader = PageStreamReader(args.path)
+    if args.page is not None:
+        print(json.dumps(reader.page(args.page), ensure_ascii=False, indent=2))
+    else:
+        print(f"{len(reader)} pages : {reader.page_nums()}")
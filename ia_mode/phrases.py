@@ -0,0 +1,97 @@
+# verse/ia_mode/phrases.py
+
+import re
+from collections import OrderedDict
+
+# Mêmes règles que is_formula_zone / is_sigle (ia_mode.extraction), motifs compilés une fois
+LATEX_RE = re.compile(r'(\$[^\$]+\$|\\\(|\\\)|\\\[|\\\]|\\begin\{(equation|align|math)\})')
+MATHML_RE = re.compile(r'<math[\s>]|<mrow[\s>]')
+CHEM_RE = re.compile(r'([A-Z][a-z]?[\d]*){2,}')
+CHEM_GROUP_RE = re.compile(r'\(?[A-Z][a-z]?[\d]*\)?([\d\(\)A-Za-z]*)')
+MATH_SYMBOLS = frozenset("=_^{}[]<>|\\/+*-∑∫√≤≥≠≈∞±×÷")
+FORMULA_EXCLUSIONS = ("CONTENTS", "ISBN", "MANNING", "SHELTER ISLAND", "PREFACE", "INDEX", "AUTHOR", "CHAPTER")
+KNOWN_SIGLES = frozenset(["ONU", "OMS", "UNESCO", "CNAM", "WHO", "AI", "USA", "EU", "etc"])
+
+# Nombre de phrases distinctes gardées en mémoire (en-têtes / pieds de page reviennent à chaque page)
+MEMO_SIZE = 4096
+
+class PhraseClassifier:
+    """
+    Classe une phrase en un seul appel : {"is_formula", "is_sigle", "non_translatable"}.
+    Les motifs sont compilés une fois, les symboles mathématiques, lettres et chiffres
+    comptés en un seul parcours du texte, et les phrases déjà vues servies par un cache LRU.
+    """
+
+    def __init__(self, mode="strict", detect_latex=True, detect_mathml=True, detect_chem=True,
+                 known_sigles=None, memo_size=MEMO_SIZE):
+        self.mode = mode
+        self.detect_latex = detect_latex
+        self.detect_mathml = detect_mathml
+        self.detect_chem = detect_chem
+        self.known_sigles = frozenset(known_sigles) if known_sigles is not None else KNOWN_SIGLES
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+
+    def is_sigle(self, text):
+        return text.strip().upper() in self.known_sigles
+
+    def _is_chem(self, text, n_digits):
+        return bool(CHEM_RE.fullmatch(text)) or bool(CHEM_GROUP_RE.fullmatch(text)) and n_digits > 0
+
+    def is_formula(self, text):
+        text = text.strip()
+        if not text or len(text) < 3:
+            return False
+        # Exceptions : jamais taguer comme formule des mots connus (auteurs, titres, ISBN, sommaire, etc.)
+        if text.upper().startswith(FORMULA_EXCLUSIONS):
+            return False
+        if self.detect_latex and LATEX_RE.search(text):
+            return True
+        if self.detect_mathml and MATHML_RE.search(text):
+            return True
+        n_symbols = n_alpha = n_digits = 0
+        for c in text:
+            if c in MATH_SYMBOLS:
+                n_symbols += 1
+            elif c.isdigit():
+                n_digits += 1
+            if c.isalpha():
+                n_alpha += 1
+        if self.detect_chem and self._is_chem(text, n_digits):
+            return True
+        ratio = n_symbols / len(text)
+        if self.mode == "strict":
+            symbolic = (n_symbols >= 2 and n_digits > 0 and len(text) > 6) or ratio > 0.3
+        else:
+            symbolic = (n_symbols >= 1 and len(text) > 3) or ratio > 0.16
+        if symbolic:
+            # Sauf si beaucoup de lettres et aucun symbole math
+            return not (n_alpha > 8 and n_symbols <= 2)
+        return False
+
+    def classify(self, text):
+        """
+        {"is_formula", "is_sigle", "non_translatable"} d'une phrase (copie : modifiable par l'appelant).
+        """
+        result = self._memo.get(text)
+        if result is not None:
+            self._memo.move_to_end(text)
+            return dict(result)
+        is_formula = self.is_formula(text)
+        is_sigle = self.is_sigle(text)
+        result = {
+            "is_formula": is_formula,
+            "is_sigle": is_sigle,
+            "non_translatable": is_sigle or is_formula,
+        }
+        self._memo[text] = result
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return dict(result)
+
+    def classify_many(self, texts):
+        """
+        Classement d'une liste de phrases (une entrée par phrase, dans l'ordre) ;
+        les doublons de la liste ne sont évalués qu'une fois.
+        """
+        return [self.classify(t) for t in texts]
@@ -2,7 +2,7 @@
 
 import os
 from ia_mode.utils import pdf_to_images, save_images
-from ia_mode.segment import segment_image
+from ia_mode.layout import detect_layout_batch
 from ia_mode.ocr import ocr_blocks
 from ia_mode.translate import translate_blocks
 from ia_mode.reconstruct import reconstruct_pdf, reconstruct_docx
@@ -29,18 +29,22 @@ def process_pdf(
     images_tmp_dir="output_images",
     figures_tmp_dir="output_figures",
     src_lang="fr",
-    tgt_lang="en"
+    tgt_lang="en",
+    layout_batch_size=4,
+    layout_torch_threads=None
 ):
     # 1. PDF -> images
     print("[1/6] Conversion PDF → images…")
     pages = pdf_to_images(pdf_path, dpi=300, out_dir=images_tmp_dir)
     print(f"    {len(pages)} pages extraites.")
     
+    print(f"[2/6] Segmentation des {len(pages)} pages (par lots de {layout_batch_size})…")
+    pages_layout = detect_layout_batch(pages, batch_size=layout_batch_size, torch_threads=layout_torch_threads)
+
     pages_blocks = []
     for i, img in enumerate(pages):
-        print(f"[2/6] Segmentation page {i+1}/{len(pages)}…")
-        blocs = segment_image(img)
-        print(f"    {len(blocs)} blocs détectés.")
+        blocs = [{"type": b["type"], "box": b["bbox"], "score": b["score"]} for b in pages_layout[i]]
+        print(f"    Page {i+1} : {len(blocs)} blocs détectés.")
         
         print(f"[3/6] Extraction OCR page {i+1}…")
         blocs = ocr_blocks(img, blocs, lang=src_lang)
@@ -0,0 +1,267 @@
+# verse/ia_mode/raster.py
+
+import queue
+import threading
+from pdf2image import convert_from_path
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+DEBUG = False
+
+# Moteur de rendu d'un crop (PageRaster), noté dans image.info["renderer"]
+RENDERER_POPPLER = "poppler"
+RENDERER_PDFIUM = "pdfium"
+
+def log(msg):
+    if DEBUG:
+        print(msg)
+
+def page_batches(page_nums, batch_size=8):
+    """
+    Découpe une liste de pages (index 0) en lots de pages consécutives,
+    chaque lot contenant au plus 'batch_size' pages.
+    Un lot correspond à un seul appel pdftoppm (first_page/last_page).
+    """
+    batch_size = max(1, int(batch_size or 1))
+    batches = []
+    curr = []
+    for p in page_nums:
+        if curr and (p != curr[-1] + 1 or len(curr) >= batch_size):
+            batches.append(curr)
+            curr = []
+        curr.append(p)
+    if curr:
+        batches.append(curr)
+    return batches
+
+def render_pages(pdf_path, page_nums, dpi=300, thread_count=1, batch_size=8):
+    """
+    Rend les pages demandées par lots consécutifs (un seul processus poppler par lot).
+    Générateur de tuples (page_num, PIL.Image | None, erreur | None), dans l'ordre de 'page_nums'.
+    Si un lot échoue, ses pages sont rendues une par une pour isoler la page fautive.
+    """
+    for batch in page_batches(page_nums, batch_size):
+        try:
+            images = convert_from_path(
+                pdf_path, dpi=dpi,
+                first_page=batch[0] + 1, last_page=batch[-1] + 1,
+                thread_count=max(1, min(thread_count, len(batch)))
+            )
+            if len(images) != len(batch):
+                raise RuntimeError(f"{len(images)} images rendues pour {len(batch)} pages")
+        except Exception as e:
+            log(f"[RASTER] Lot {batch[0]+1}-{batch[-1]+1} en échec ({e}), rendu page par page.")
+            for page_num in batch:
+                try:
+                    image = convert_from_path(pdf_path, dpi=dpi, first_page=page_num + 1, last_page=page_num + 1)[0]
+                    yield page_num, image, None
+                except Exception as page_err:
+                    yield page_num, None, page_err
+            continue
+        for page_num, image in zip(batch, images):
+            yield page_num, image, None
+
+class PageRasterizer:
+    """
+    Étape de rastérisation au niveau document.
+    Un thread de fond rend les pages par lots (pdf2image/pdftoppm) et les dépose dans une
+    file bornée : le rendu des pages suivantes se fait pendant l'OCR / la mise en page
+    de la page courante, sans jamais garder plus de 'queue_size' pages d'avance en mémoire.
+
+    Itérer sur l'objet donne des tuples (page_num, PIL.Image) dans l'ordre des pages ;
+    l'image vaut None si la page n'a pas pu être rendue (l'erreur est dans self.errors).
+    """
+
+    _DONE = object()
+
+    def __init__(self, pdf_path, page_nums, dpi=300, thread_count=1, batch_size=8, queue_size=4):
+        self.pdf_path = pdf_path
+        self.page_nums = list(page_nums)
+        self.dpi = dpi
+        self.thread_count = thread_count
+        self.batch_size = batch_size
+        self.errors = {}
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="page-rasterizer", daemon=True)
+            self._thread.start()
+        return self
+
+    def _put(self, item):
+        # put() avec timeout pour pouvoir s'arrêter si le consommateur abandonne
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            for item in render_pages(self.pdf_path, self.page_nums, self.dpi, self.thread_count, self.batch_size):
+                if not self._put(item):
+                    return
+        except Exception as e:
+            # Erreur inattendue du générateur : on la remonte au consommateur
+            self._put((None, None, e))
+        finally:
+            self._put(self._DONE)
+
+    def __iter__(self):
+        self.start()
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            page_num, image, error = item
+            if page_num is None:
+                raise error
+            if error is not None:
+                self.errors[page_num] = error
+                log(f"[RASTER] Rendu impossible pour la page {page_num+1}: {error}")
+            yield page_num, image
+
+    def close(self):
+        self._stop.set()
+        # Vide la file pour débloquer le thread de rendu
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class PageRaster:
+    """
+    Accès raster d'une page pour les crops (images intégrées, formules, OCR de repli).
+    - Avec le rendu pleine page ('image'), les crops sont découpés dans ce rendu : aucun
+      nouveau rendu, quel que soit le nombre de crops.
+    - Sans rendu (page texte dont la mise en page est déjà connue), seule la région demandée
+      est rendue (pypdfium2, rendu restreint par 'crop'), à la résolution demandée ; le rendu
+      pleine page n'est fait que si .image est demandé.
+    crop() prend une bbox en pixels du rendu à 'dpi' (même interface que PIL Image.crop),
+    crop_points() une bbox en points PDF (repère pdfplumber).
+    Les crops découpés dans le rendu pleine page viennent de poppler (comme les étapes en
+    cache ; pdfium pour un PDF ouvert depuis un flux) ; ceux rendus région par région viennent de pdfium (anticrénelage et arrondis
+    différents : pixels proches mais pas identiques). Le moteur est noté dans
+    crop.info["renderer"]. Sans pypdfium2, les crops sont toujours découpés dans le rendu
+    pleine page (rendu à la demande).
+    """
+
+    def __init__(self, page, dpi=300, image=None):
+        from ia_mode.coords import PageCoords
+        self.page = page
+        self.dpi = dpi
+        self._image = image
+        # Rendus fournis (PageRasterizer, cache de pages) : poppler
+        self._image_renderer = RENDERER_POPPLER
+        self.coords = PageCoords.for_page(page, image, dpi=dpi)
+        self.size = (self.coords.image_width, self.coords.image_height)
+        self.full_renders = 0
+        self.region_renders = 0
+        self._pdfium_doc = None
+
+    @property
+    def has_image(self):
+        return self._image is not None
+
+    @property
+    def image(self):
+        """
+        Rendu pleine page (poppler, comme PageRasterizer : mêmes pixels que les étapes en cache).
+        PDF ouvert depuis un flux (pas de chemin pour pdftoppm) : rendu pdfium, ou poppler sur les
+        octets du flux sans pypdfium2.
+        """
+        if self._image is None:
+            from ia_mode.metrics import stage
+            pdf = self.page.pdf
+            num = self.page.page_number
+            with stage(num - 1, "render"):
+                if pdf.path:
+                    image = convert_from_path(pdf.path, dpi=self.dpi, first_page=num, last_page=num)[0]
+                elif pypdfium2 is not None:
+                    image = self._pdfium_page().render(scale=self.dpi / 72.0).to_pil()
+                    self._image_renderer = RENDERER_PDFIUM
+                else:
+                    from pdf2image import convert_from_bytes
+                    pdf.stream.seek(0)
+                    image = convert_from_bytes(pdf.stream.read(), dpi=self.dpi, first_page=num, last_page=num)[0]
+                self._image = image.convert("RGB")
+            self.full_renders += 1
+            # Le repère suit la taille réelle du rendu
+            from ia_mode.coords import PageCoords
+            self.coords = PageCoords.for_page(self.page, self._image, dpi=self.dpi)
+            self.size = self._image.size
+        return self._image
+
+    def _pdfium_page(self):
+        if self._pdfium_doc is None:
+            pdf = self.page.pdf
+            self._pdfium_doc = pypdfium2.PdfDocument(pdf.path or pdf.stream, password=getattr(pdf, "password", None))
+        return self._pdfium_doc[self.page.page_number - 1]
+
+    def _render(self, bbox, resolution):
+        # Rendu de la seule région 'bbox' (points, origine en haut) à 'resolution' dpi
+        from ia_mode.metrics import stage
+        width, height = float(self.page.width), float(self.page.height)
+        x0, top, x1, bottom = max(0.0, bbox[0]), max(0.0, bbox[1]), min(width, bbox[2]), min(height, bbox[3])
+        # Marges à retirer (gauche, bas, droite, haut), en points, origine PDF en bas
+        crop = (x0, height - bottom, width - x1, top)
+        with stage(self.page.page_number - 1, "render_region"):
+            bitmap = self._pdfium_page().render(scale=resolution / 72.0, crop=crop)
+            image = bitmap.to_pil().convert("RGB")
+        self.region_renders += 1
+        image.info["renderer"] = RENDERER_PDFIUM
+        return image
+
+    def crop(self, box):
+        """
+        Crop d'une bbox en pixels du rendu à 'dpi'.
+        """
+        box = tuple(int(v) for v in box[:4])
+        if self._image is not None or pypdfium2 is None:
+            image = self.image.crop(box)
+            image.info["renderer"] = self._image_renderer
+            return image
+        image = self._render(self.coords.to_points(box), self.dpi)
+        size = (max(1, box[2] - box[0]), max(1, box[3] - box[1]))
+        # Arrondis du rendu : la région a exactement la taille du crop équivalent dans le rendu complet
+        return image if image.size == size else image.resize(size)
+
+    def crop_points(self, bbox, resolution=None):
+        """
+        Crop d'une bbox en points PDF, à 'resolution' dpi (défaut : dpi du rendu).
+        """
+        resolution = resolution or self.dpi
+        # Rendu disponible et assez fin (ou pas de pypdfium2) : simple crop redimensionné si besoin ;
+        # sinon rendu de la région
+        if resolution == self.dpi or pypdfium2 is None or (self._image is not None and resolution < self.dpi):
+            image = self.crop(self.coords.to_pixels(bbox))
+            if resolution != self.dpi:
+                # resize() garde image.info (moteur de rendu)
+                scale = resolution / self.dpi
+                image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))))
+            return image
+        return self._render(bbox, resolution)
+
+    def close(self):
+        # Libère le document pypdfium2 des rendus de régions (le rendu pleine page est gardé)
+        if self._pdfium_doc is not None:
+            self._pdfium_doc.close()
+            self._pdfium_doc = None
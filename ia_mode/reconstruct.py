@@ -1,30 +1,24 @@
 # verse/ia_mode/reconstruct.py
 
 import os
-import json
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.utils import ImageReader
+from ia_mode.page_format import iter_pages
 
 def reconstruct_pdf(json_dir, output_pdf, page_size=A4):
     """
     Reconstruit un PDF à partir des JSON extraits.
-    - json_dir : dossier où sont stockés les JSON par page
+    - json_dir : dossier où sont stockés les JSON par page (.json ou .vpk), ou export .vpk / .ndjson
     - output_pdf : chemin du PDF à générer
     - page_size : A4 ou letter (tuple largeur, hauteur)
     """
-    json_files = sorted([f for f in os.listdir(json_dir) if f.endswith('.json')])
-    if not json_files:
-        print(f"Aucun JSON trouvé dans {json_dir}")
-        return
-
     c = canvas.Canvas(output_pdf, pagesize=page_size)
     page_width, page_height = page_size
 
-    for json_file in json_files:
-        with open(os.path.join(json_dir, json_file), encoding="utf8") as f:
-            page = json.load(f)
-
+    n_pages = 0
+    for page in iter_pages(json_dir):
+        n_pages += 1
         blocks = page.get("blocks", [])
         # On suppose que les bboxes sont relatives à la taille du PDF d'origine
         w_ratio = page_width / page["width"] if page.get("width") else 1.0
@@ -72,6 +66,9 @@ def reconstruct_pdf(json_dir, output_pdf, page_size=A4):
             # À venir : tableaux, liens, styles avancés…
 
         c.showPage()
+    if not n_pages:
+        print(f"Aucun JSON trouvé dans {json_dir}")
+        return
     c.save()
     print(f"PDF reconstitué généré dans {output_pdf}")
 
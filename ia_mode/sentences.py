@@ -0,0 +1,64 @@
+# verse/ia_mode/sentences.py
+
+from ia_mode.models import get_ner, get_sentence_nlp
+
+# "parser"      : découpage du pipeline complet (identique à NER(text).sents), composants inutiles désactivés
+# "senter"      : composant statistique "senter" seul, plus rapide, frontières très proches
+# "sentencizer" : règles de ponctuation, le plus rapide
+SENTENCE_MODE = "parser"
+SENTENCE_BATCH_SIZE = 64
+SENTENCE_N_PROCESS = 1
+
+# Composants dont dépendent les frontières de phrases du parser
+_PARSER_COMPONENTS = ("tok2vec", "transformer", "parser")
+
+def sentence_spans(texts, mode=None, batch_size=None, n_process=None):
+    """
+    Découpe une liste de textes en phrases en un seul passage nlp.pipe.
+    Retourne, pour chaque texte, la liste des (start_char, end_char) de ses phrases.
+    """
+    mode = mode or SENTENCE_MODE
+    batch_size = batch_size or SENTENCE_BATCH_SIZE
+    n_process = n_process or SENTENCE_N_PROCESS
+    texts = list(texts)
+    if not texts:
+        return []
+    if mode == "parser":
+        nlp = get_ner()
+        disable = [name for name in nlp.pipe_names if name not in _PARSER_COMPONENTS]
+        docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disable)
+    else:
+        nlp = get_sentence_nlp(mode)
+        docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+    return [[(sent.start_char, sent.end_char) for sent in doc.sents] for doc in docs]
+
+def word_start_offsets(words):
+    """
+    Position de début de chaque mot dans " ".join(textes des mots).
+    """
+    starts = []
+    running = 0
+    for w in words:
+        starts.append(running)
+        running += len(w['text']) + 1
+    return starts
+
+def align_words_to_spans(words, spans):
+    """
+    Répartit les mots (déjà en ordre de lecture) entre les phrases, d'après les offsets
+    caractères (start_char, end_char) des phrases dans " ".join(mots).
+    Un seul curseur sur les mots : O(W + S). Chaque mot va dans la phrase où il commence
+    (à défaut, la phrase précédente) : aucun mot n'est perdu, même si la phrase coupe un mot
+    (césure, ponctuation collée) ou si ses limites ne tombent pas sur un espace.
+    """
+    starts = word_start_offsets(words)
+    groups = []
+    cursor = 0
+    for k in range(len(spans)):
+        next_start = spans[k + 1][0] if k + 1 < len(spans) else float("inf")
+        group = []
+        while cursor < len(words) and starts[cursor] < next_start:
+            group.append(words[cursor])
+            cursor += 1
+        groups.append(group)
+    return groups
@@ -0,0 +1,79 @@
+# verse/ia_mode/spatial.py
+
+import math
+
+class WordGridIndex:
+    """
+    Index spatial (grille uniforme) sur les mots d'une page.
+    Chaque mot est rangé dans la cellule de son point d'ancrage (x0, y0), le même point
+    que celui testé par group_words_by_block : une requête par bbox ne parcourt que les
+    cellules recouvertes au lieu de tous les mots de la page.
+    """
+
+    def __init__(self, words, cell_size=None):
+        self.words = words
+        self.anchors = [(float(w["bbox"][0]), float(w["bbox"][1])) for w in words]
+        self.cells = {}
+        if not self.anchors:
+            self.cell_size = 1.0
+            self.min_x = self.min_y = 0.0
+            return
+        xs = [a[0] for a in self.anchors]
+        ys = [a[1] for a in self.anchors]
+        self.min_x, self.min_y = min(xs), min(ys)
+        if cell_size is None:
+            # Environ 4 mots par cellule en moyenne sur l'étendue des ancrages
+            extent = max(max(xs) - self.min_x, 1.0) * max(max(ys) - self.min_y, 1.0)
+            cell_size = math.sqrt(extent * 4 / len(self.anchors))
+        self.cell_size = max(float(cell_size), 1.0)
+        for i, (x, y) in enumerate(self.anchors):
+            self.cells.setdefault(self._cell(x, y), []).append(i)
+
+    def _cell(self, x, y):
+        return int((x - self.min_x) // self.cell_size), int((y - self.min_y) // self.cell_size)
+
+    def query(self, bbox):
+        """
+        Indices (croissants) des mots dont l'ancrage est dans la bbox (bornes incluses).
+        """
+        if not self.cells:
+            return []
+        bx0, by0, bx1, by1 = bbox
+        cx0, cy0 = self._cell(bx0, by0)
+        cx1, cy1 = self._cell(bx1, by1)
+        found = []
+        # Parcourt les cellules de la bbox, ou les cellules occupées si elles sont moins nombreuses
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            candidates = (idx for (cx, cy), idxs in self.cells.items()
+                          if cx0 <= cx <= cx1 and cy0 <= cy <= cy1 for idx in idxs)
+        else:
+            candidates = (idx for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)
+                          for idx in self.cells.get((cx, cy), ()))
+        for i in candidates:
+            x, y = self.anchors[i]
+            if bx0 <= x <= bx1 and by0 <= y <= by1:
+                found.append(i)
+        found.sort()
+        return found
+
+def assign_words_to_blocks(words, blocks, index=None):
+    """
+    Répartit les mots entre les blocs : chaque mot va dans exactement un bloc, celui
+    dont la bbox contient son ancrage et qui a la plus petite surface (à surface égale,
+    le premier bloc). Les mots hors de tout bloc ne sont assignés à aucun bloc.
+    Retourne une liste (une entrée par bloc) de listes de mots, dans l'ordre des mots.
+    """
+    index = index or WordGridIndex(words)
+    owner = {}
+    owner_area = {}
+    for block_id, block in enumerate(blocks):
+        bx0, by0, bx1, by1 = block["bbox"]
+        area = (bx1 - bx0) * (by1 - by0)
+        for i in index.query(block["bbox"]):
+            if i not in owner or area < owner_area[i]:
+                owner[i] = block_id
+                owner_area[i] = area
+    assigned = [[] for _ in blocks]
+    for i in sorted(owner):
+        assigned[owner[i]].append(words[i])
+    return assigned
@@ -0,0 +1,142 @@
+# verse/ia_mode/tables.py
+
+DEBUG = False
+
+def log(msg):
+    if DEBUG:
+        print(msg)
+
+_VERSIONS = {}
+
+def _camelot_version():
+    if "camelot" not in _VERSIONS:
+        try:
+            import camelot
+            _VERSIONS["camelot"] = str(camelot.__version__)
+        except Exception:
+            _VERSIONS["camelot"] = "unknown"
+    return _VERSIONS["camelot"]
+
+def _serialize_table(table):
+    bbox = getattr(table, "_bbox", None)
+    return {
+        "data": getattr(table, "data", []),
+        "bbox": list(bbox) if bbox is not None else None
+    }
+
+def read_tables_pages(pdf_path, page_nums, flavor="stream"):
+    """
+    Tableaux camelot de plusieurs pages en un seul camelot.read_pdf (le PDF n'est ouvert
+    et découpé qu'une fois pour toutes les pages demandées).
+    Retourne {page_num (index 0): [{"data": [[...]], "bbox": [...]}, ...]}.
+    Si l'appel groupé échoue, les pages sont relues une par une pour isoler la page fautive.
+    """
+    import camelot
+    page_nums = sorted(set(page_nums))
+    result = {p: [] for p in page_nums}
+    if not page_nums:
+        return result
+    try:
+        cam_tables = camelot.read_pdf(pdf_path, pages=",".join(str(p+1) for p in page_nums), flavor=flavor)
+    except Exception as e:
+        if len(page_nums) == 1:
+            log(f"[Camelot] Tables not found on page {page_nums[0]+1}: {e}")
+            return result
+        log(f"[Camelot] Lecture groupée en échec ({e}), lecture page par page.")
+        for p in page_nums:
+            result.update(read_tables_pages(pdf_path, [p], flavor=flavor))
+        return result
+    for table in cam_tables:
+        page_num = int(table.page) - 1
+        result.setdefault(page_num, []).append(_serialize_table(table))
+    return result
+
+class TableStage:
+    """
+    Étape tableaux au niveau document.
+    prefetch() lance la lecture camelot des pages demandées par paquets de 'chunk_size'
+    pages (un read_pdf par paquet), en arrière-plan sur un pool de 'workers' processus
+    si workers > 0 ; get() rend les tableaux d'une page (en attendant son paquet si besoin).
+    Les résultats sont gardés en mémoire, et dans le cache de pages s'il est fourni.
+    """
+
+    def __init__(self, pdf_path, flavor="stream", chunk_size=8, workers=0, cache=None, page_hashes=None):
+        self.pdf_path = pdf_path
+        self.flavor = flavor
+        self.chunk_size = max(1, chunk_size)
+        self.cache = cache
+        self.page_hashes = page_hashes if page_hashes is not None else {}
+        self._results = {}
+        self._pending = {}
+        self.workers = workers or 0
+        self._executor = None
+
+    def _cache_key(self, page_num):
+        page_hash = self.page_hashes.get(page_num)
+        if self.cache is None or page_hash is None:
+            return None
+        return self.cache.key(page_hash, "tables", {"flavor": self.flavor, "camelot": _camelot_version()})
+
+    def _store(self, page_num, tables):
+        self._results[page_num] = tables
+        key = self._cache_key(page_num)
+        if key is not None:
+            try:
+                self.cache.put_json(key, "tables", tables)
+            except Exception as e:
+                log(f"[CACHE] Tableaux non mis en cache (page {page_num+1}) : {e}")
+
+    def prefetch(self, page_nums):
+        todo = []
+        for p in sorted(set(page_nums)):
+            if p in self._results or p in self._pending:
+                continue
+            key = self._cache_key(p)
+            cached = self.cache.get_json(key, "tables") if key is not None else None
+            if cached is not None:
+                self._results[p] = cached
+            else:
+                todo.append(p)
+        for i in range(0, len(todo), self.chunk_size):
+            chunk = todo[i:i + self.chunk_size]
+            if self.workers > 0:
+                if self._executor is None:
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                future = self._executor.submit(read_tables_pages, self.pdf_path, chunk, self.flavor)
+                for p in chunk:
+                    self._pending[p] = future
+            else:
+                for p, tables in read_tables_pages(self.pdf_path, chunk, self.flavor).items():
+                    self._store(p, tables)
+
+    def get(self, page_num):
+        if page_num not in self._results and page_num not in self._pending:
+            self.prefetch([page_num])
+        future = self._pending.get(page_num)
+        if future is not None:
+            try:
+                chunk_result = future.result()
+            except Exception as e:
+                log(f"[Camelot] Paquet de pages en échec : {e}")
+                chunk_result = {}
+            for p, f in list(self._pending.items()):
+                if f is future:
+                    del self._pending[p]
+                    self._store(p, chunk_result.get(p, []))
+        return self._results.pop(page_num, [])
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
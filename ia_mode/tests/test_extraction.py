@@ -1,10 +1,10 @@
 import sys
 import os
 
-# Ajoute le dossier parent à sys.path pour importer extraction.py
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Ajoute la racine du projet à sys.path pour importer le package ia_mode
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-from extraction import extract_all
+from ia_mode.extraction import extract_all
 
 if __name__ == "__main__":
     import argparse
@@ -32,6 +32,19 @@ if __name__ == "__main__":
     parser.add_argument("--start_page", type=int, default=1, help="Première page à extraire (défaut : 1)")
     parser.add_argument("--end_page", type=int, default=None, help="Dernière page à extraire (défaut: dernière)")
     parser.add_argument("--max_pages", type=int, default=None, help="Nombre max de pages à extraire (défaut: tout)")
+    parser.add_argument("--dpi", type=int, default=300, help="Résolution de rendu des pages (défaut : 300)")
+    parser.add_argument("--raster_threads", type=int, default=1, help="Threads pdftoppm par lot de pages (défaut : 1)")
+    parser.add_argument("--workers", type=int, default=1, help="Nombre de processus d'extraction en parallèle (défaut : 1)")
+    parser.add_argument("--layout_max_side", type=int, default=None,
+                        help="Grand côté (px) de l'image donnée au modèle de mise en page (défaut : rendu complet)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprend une extraction interrompue (pages absentes ou en échec seulement)")
+    parser.add_argument("--cache_dir", type=str, default=None, help="Cache disque des étapes par page (défaut : désactivé)")
+    parser.add_argument("--no_metrics", action="store_true", help="Désactive export/metrics.jsonl")
+    parser.add_argument("--ocr_mode", default="auto", choices=["auto", "always", "never"],
+                        help="OCR pleine page : pages scannées/hybrides seulement (auto), toutes (always), aucune (never)")
+    parser.add_argument("--no_page_images", action="store_true", help="N'écrit pas images/page_N.png (aperçus)")
+    parser.add_argument("--png_compress_level", type=int, default=1, help="Compression des PNG de page, 0-9 (défaut : 1)")
 
     args = parser.parse_args()
     pages_list = parse_pages_list(args.pages)
@@ -41,11 +54,21 @@ if __name__ == "__main__":
         max_pages=args.max_pages,
         start_page=args.start_page,
         end_page=args.end_page,
-        pages=pages_list
+        pages=pages_list,
+        dpi=args.dpi,
+        raster_threads=args.raster_threads,
+        workers=args.workers,
+        layout_max_side=args.layout_max_side,
+        resume=args.resume,
+        cache_dir=args.cache_dir,
+        metrics=not args.no_metrics,
+        save_page_images=not args.no_page_images,
+        png_compress_level=args.png_compress_level,
+        ocr_mode=args.ocr_mode
     )
 
     # Résumé output
-    from extraction import make_output_dirs
+    from ia_mode.extraction import make_output_dirs
     dirs = make_output_dirs(args.pdf)
     json_dir = dirs["json"]
 
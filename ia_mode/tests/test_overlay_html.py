@@ -0,0 +1,29 @@
+import sys
+import os
+import json
+import re
+
+# Ajoute la racine du projet à sys.path pour importer le package ia_mode
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from PIL import Image
+from ia_mode.overlay_html import overlay_html
+
+def test_overlay_places_block_in_image_pixels(tmp_path):
+    # Page A4 en points, rendue à 300 dpi ; bloc de 1 x 0.5 pouce à (1, 2) pouces
+    page = {"page_num": 1, "width": 595.0, "height": 842.0, "coord_space": "pdf_points_top_left", "dpi": 300,
+            "image_size": [2479, 3508],
+            "blocks": [{"type": "Text", "bbox": [72.0, 144.0, 144.0, 180.0], "sentences": ["Bonjour."]}]}
+    json_path = tmp_path / "page_1.json"
+    json_path.write_text(json.dumps(page), encoding="utf8")
+    img_path = tmp_path / "page_1.png"
+    Image.new("RGB", (2479, 3508), "white").save(img_path)
+    out = tmp_path / "out" / "page_1.html"
+    overlay_html(str(img_path), str(json_path), str(out))
+    html = out.read_text(encoding="utf8")
+    css = dict(re.findall(r"(left|top|width|height):([\d.]+)px", html.split('class="page-bg"')[1]))
+    scale = 2479 / 595.0
+    assert abs(float(css["left"]) - 72.0 * scale) < 0.01
+    assert abs(float(css["top"]) - 144.0 * 3508 / 842.0) < 0.01
+    assert abs(float(css["width"]) - 72.0 * scale) < 0.01
+    assert abs(float(css["height"]) - 36.0 * 3508 / 842.0) < 0.01
@@ -1,6 +1,6 @@
 import os
-import json
 from PIL import Image, ImageDraw, ImageFont
+from ia_mode.page_format import load_page, page_files
 
 COLORS = {
     "Text": (0, 200, 0),
@@ -29,8 +29,7 @@ def draw_blocks_on_image(
     show_lines=True
 ):
     img = Image.open(image_path).convert("RGBA")
-    with open(json_path, encoding="utf8") as f:
-        data = json.load(f)
+    data = load_page(json_path)
 
     page_w = data.get("width", img.width)
     page_h = data.get("height", img.height)
@@ -110,11 +109,11 @@ def draw_document_overlays(
     show_lines=True
 ):
     os.makedirs(out_dir, exist_ok=True)
-    for file in os.listdir(json_dir):
-        if not file.startswith("page_") or not file.endswith(".json"):
+    for json_path in page_files(json_dir):
+        file = os.path.basename(json_path)
+        if not file.startswith("page_"):
             continue
-        json_path = os.path.join(json_dir, file)
-        page_num = int(file.replace("page_", "").replace(".json", ""))
+        page_num = int(os.path.splitext(file)[0].replace("page_", ""))
         img_path = os.path.join(images_dir, f"page_{page_num}.png")
         if not os.path.exists(img_path):
             continue
@@ -0,0 +1,81 @@
+# verse/ia_mode/word_merge.py
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+import numpy as np
+
+# Taille des paquets de mots OCR comparés d'un coup (borne la mémoire de la matrice IoU)
+IOU_CHUNK = 512
+
+def bbox_array(words, scale=1.0):
+    """
+    Tableau (N, 4) float64 des bbox [x0, y0, x1, y1] des mots, multipliées par 'scale'.
+    """
+    if not words:
+        return np.zeros((0, 4), dtype=np.float64)
+    return np.asarray([w["bbox"][:4] for w in words], dtype=np.float64) * scale
+
+def iou_matrix(a, b):
+    """
+    IoU vectorisé entre deux tableaux de bbox (N, 4) et (M, 4) -> matrice (N, M).
+    """
+    ix0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix1 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy1 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix1 - ix0, 0, None) * np.clip(iy1 - iy0, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+def normalize_word(text):
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return re.sub(r"[^\w]", "", text)
+
+def text_similarity(a, b):
+    a, b = normalize_word(a), normalize_word(b)
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+def merge_words(pdf_words, ocr_words, ocr_scale=1.0, iou_thresh=0.3, text_thresh=0.8):
+    """
+    Fusionne les mots pdfplumber (points PDF) et les mots OCR. Si les bbox OCR sont encore
+    en pixels, 'ocr_scale' (72 / dpi) les ramène en points pour l'appariement :
+    IoU vectorisé NumPy, puis similarité de texte sur les seules paires candidates,
+    appariement glouton 1-1 par IoU décroissant.
+    Un mot présent dans les deux sources n'est gardé qu'une fois (version pdfplumber,
+    qui porte le style) ; chaque mot reçoit sa provenance ("provenance": ["pdf", "ocr"]).
+    Les bbox des mots conservés ne sont pas modifiées.
+    """
+    merged = [dict(w, provenance=["pdf"]) for w in pdf_words]
+    if not ocr_words:
+        return merged
+    pdf_boxes = bbox_array(pdf_words)
+    ocr_boxes = bbox_array(ocr_words, ocr_scale)
+    pairs = []
+    if len(pdf_boxes):
+        for start in range(0, len(ocr_boxes), IOU_CHUNK):
+            iou = iou_matrix(ocr_boxes[start:start + IOU_CHUNK], pdf_boxes)
+            rows, cols = np.nonzero(iou >= iou_thresh)
+            for r, c in zip(rows.tolist(), cols.tolist()):
+                pairs.append((iou[r, c], start + r, c))
+    pairs.sort(key=lambda p: (-p[0], p[1], p[2]))
+    matched_ocr = set()
+    matched_pdf = set()
+    for _, oi, pi in pairs:
+        if oi in matched_ocr or pi in matched_pdf:
+            continue
+        if text_similarity(ocr_words[oi]["text"], pdf_words[pi]["text"]) < text_thresh:
+            continue
+        matched_ocr.add(oi)
+        matched_pdf.add(pi)
+        merged[pi]["provenance"].append("ocr")
+    for oi, w in enumerate(ocr_words):
+        if oi not in matched_ocr:
+            merged.append(dict(w, provenance=["ocr"]))
+    return merged